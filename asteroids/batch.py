@@ -0,0 +1,183 @@
+import argparse
+import dataclasses
+import json
+import logging
+import multiprocessing
+import random
+import sys
+import time
+from typing import Callable, Iterable, Iterator
+
+import esper
+import pygame.constants
+
+from asteroids.ecs.components import ScoreTracker
+from asteroids.ecs.entities import increase_spawn_rate
+from asteroids.ecs.enums import InputEventKind
+from asteroids.headless import DEFAULT_DELTA
+from asteroids.world import build_world
+
+
+logger = logging.getLogger(__name__)
+
+
+# (world, frame index) -> input events for that frame
+Policy = Callable[[esper.World, int], list[dict]]
+
+
+class RandomKeysPolicy:
+    """
+    Presses and releases random control keys, seeded so an episode is
+    reproducible
+    """
+
+    keys = (
+        pygame.constants.K_w,
+        pygame.constants.K_s,
+        pygame.constants.K_a,
+        pygame.constants.K_d,
+        pygame.constants.K_SPACE,
+    )
+
+    def __init__(self, seed: int, rate: float = 0.1):
+        self.random = random.Random(seed)
+        self.rate = rate
+
+    def __call__(self, world: esper.World, frame: int) -> list[dict]:
+        if self.random.random() > self.rate:
+            return []
+
+        kind = self.random.choice((InputEventKind.KeyDown, InputEventKind.KeyUp))
+
+        return [{"kind": kind, "key": self.random.choice(self.keys)}]
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class Episode:
+    seed: int
+    frames: int = 9_000
+    delta: float = DEFAULT_DELTA
+    spawn_rate_multiplier: float = 1.0
+    array_storage: bool = False
+    # must be picklable to cross process boundaries
+    policy: Policy | None = None
+
+
+@dataclasses.dataclass(slots=True)
+class EpisodeSummary:
+    seed: int
+    frames: int
+    scores: dict[str, float]
+    entities: int
+    elapsed: float
+
+
+def run_episode(episode: Episode) -> EpisodeSummary:
+    start = time.perf_counter()
+
+    world = build_world(
+        array_storage=episode.array_storage, render=False, seed=episode.seed
+    )
+
+    if episode.spawn_rate_multiplier != 1.0:
+        increase_spawn_rate(world, episode.spawn_rate_multiplier)
+
+    policy = episode.policy
+
+    for frame in range(episode.frames):
+        world.process(
+            delta=episode.delta,
+            player_input_events=policy(world, frame) if policy else [],
+        )
+
+    _, score_tracker = world.get_singleton(ScoreTracker)
+
+    return EpisodeSummary(
+        seed=episode.seed,
+        frames=episode.frames,
+        scores={kind.name: score for kind, score in score_tracker.scores.items()},
+        entities=len(world._entities),
+        elapsed=time.perf_counter() - start,
+    )
+
+
+def run_batch(
+    episodes: Iterable[Episode],
+    *,
+    workers: int | None = None,
+    chunksize: int = 1,
+) -> Iterator[EpisodeSummary]:
+    """
+    Run independent episodes across a process pool, yielding each summary as
+    soon as its episode finishes (not in submission order)
+
+    workers: pool size, defaults to the number of CPUs
+    """
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(run_episode, episodes, chunksize)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Simulate many seeded episodes")
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--frames", type=int, default=9_000)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--spawn-rate-multiplier", type=float, default=1.0)
+    parser.add_argument("--array-storage", action="store_true")
+    parser.add_argument("--idle", action="store_true", help="send no input")
+    parser.add_argument("--output", help="append summaries to this JSON lines file")
+    args = parser.parse_args(argv)
+
+    episodes = (
+        Episode(
+            seed=seed,
+            frames=args.frames,
+            spawn_rate_multiplier=args.spawn_rate_multiplier,
+            array_storage=args.array_storage,
+            policy=None if args.idle else RandomKeysPolicy(seed),
+        )
+        for seed in range(args.seed, args.seed + args.episodes)
+    )
+
+    output = open(args.output, "a") if args.output else None
+
+    start = time.perf_counter()
+    frames = 0
+
+    try:
+        for summary in run_batch(episodes, workers=args.workers):
+            frames += summary.frames
+
+            logger.info(
+                "Episode seed=%d time=%.1f kills=%d in %.2fs",
+                summary.seed,
+                summary.scores["Time"],
+                summary.scores["EnemyKill"],
+                summary.elapsed,
+            )
+
+            if output:
+                output.write(json.dumps(dataclasses.asdict(summary)) + "\n")
+    finally:
+        if output:
+            output.close()
+
+    elapsed = time.perf_counter() - start
+
+    logger.info(
+        "Simulated %d episodes, %d frames in %.2fs (%.0f frames/s)",
+        args.episodes,
+        frames,
+        elapsed,
+        frames / elapsed,
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+
+    # per-entity logs from every worker would drown out the summaries
+    logging.getLogger("asteroids.ecs").setLevel(logging.WARNING)
+
+    main()
@@ -1,3 +1 @@
-
-
 SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
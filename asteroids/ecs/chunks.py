@@ -0,0 +1,166 @@
+import collections
+import math
+
+from .components import Position, Rotation, Velocity
+
+
+class ChunkGrid:
+    """
+    Square chunks tiling the world, only those around player ships are active
+
+    Entities outside the active chunks are parked: taken out of the world's
+    database, so no processor visits them, and kept here by chunk. Parked
+    chunks are stepped a few per frame in turn, moving their entities by their
+    velocity over all the time since their previous step, so far away
+    asteroids keep drifting but cost nothing on most frames. Entities are put
+    back into the world when their chunk becomes active, or when they drift
+    into an active one.
+
+    Parked entities move at constant velocity, acceleration is ignored.
+
+    size: side length of a chunk
+    active_radius: chunks up to this many chunks away from a player ship's
+        chunk are active
+    steps_per_frame: how many parked chunks are stepped each frame
+    """
+
+    def __init__(
+        self,
+        width: float,
+        height: float,
+        size: float = 512.0,
+        *,
+        active_radius: int = 1,
+        steps_per_frame: int = 4,
+    ):
+        self.width = width
+        self.height = height
+        self.size = size
+
+        self.columns = max(math.ceil(width / size), 1)
+        self.rows = max(math.ceil(height / size), 1)
+
+        self.active_radius = active_radius
+        self.steps_per_frame = steps_per_frame
+
+        self.active: set[tuple[int, int]] = set()
+
+        # chunk -> [entity, components, time of its previous step]
+        self.parked: dict[tuple[int, int], list[list]] = {}
+
+        # chunks to step, in turn
+        self.queue: collections.deque[tuple[int, int]] = collections.deque()
+        self.queued: set[tuple[int, int]] = set()
+
+        # ms simulated so far
+        self.time = 0.0
+
+    def __len__(self):
+        return sum(map(len, self.parked.values()))
+
+    def key(self, x: float, y: float) -> tuple[int, int]:
+        return int(x // self.size) % self.columns, int(y // self.size) % self.rows
+
+    def activate(self, positions) -> list[tuple[int, int]]:
+        """
+        Make the chunks around the given (x, y) positions the active ones,
+        return those that were not active before
+        """
+        active = set()
+        radius = self.active_radius
+
+        for x, y in positions:
+            column, row = self.key(x, y)
+
+            for i in range(column - radius, column + radius + 1):
+                for j in range(row - radius, row + radius + 1):
+                    active.add((i % self.columns, j % self.rows))
+
+        activated = sorted(active - self.active)
+
+        self.active = active
+
+        return activated
+
+    def park(self, entity: int, components: dict[type, object]):
+        position = components[Position]
+
+        self._add(self.key(position.x, position.y), [entity, components, self.time])
+
+    def unpark(self, key: tuple[int, int]) -> list[tuple[int, dict]]:
+        """
+        Take all entities out of the chunk, brought up to date
+        """
+        entries = self.parked.pop(key, ())
+
+        for entry in entries:
+            self._advance(entry)
+
+        return [(entity, components) for entity, components, _ in entries]
+
+    def step(self) -> list[tuple[int, dict]]:
+        """
+        Step the next few parked chunks, return the entities that moved into
+        an active chunk
+        """
+        woken = []
+
+        for _ in range(min(self.steps_per_frame, len(self.queue))):
+            key = self.queue.popleft()
+            self.queued.discard(key)
+
+            # woken up since it was queued
+            entries = self.parked.pop(key, None)
+
+            if entries is None:
+                continue
+
+            for entry in entries:
+                self._advance(entry)
+
+                position = entry[1][Position]
+                new_key = self.key(position.x, position.y)
+
+                if new_key in self.active:
+                    woken.append((entry[0], entry[1]))
+                else:
+                    self._add(new_key, entry)
+
+        return woken
+
+    def clear(self):
+        self.active.clear()
+        self.parked.clear()
+        self.queue.clear()
+        self.queued.clear()
+
+    def _add(self, key: tuple[int, int], entry: list):
+        entries = self.parked.get(key)
+
+        if entries is None:
+            entries = self.parked[key] = []
+
+        entries.append(entry)
+
+        if key not in self.queued:
+            self.queue.append(key)
+            self.queued.add(key)
+
+    def _advance(self, entry: list):
+        _, components, previous = entry
+        elapsed = self.time - previous
+
+        entry[2] = self.time
+
+        position = components[Position]
+        velocity = components.get(Velocity)
+        rotation = components.get(Rotation)
+
+        if velocity is not None:
+            position.x = (position.x + velocity.x * elapsed) % self.width
+            position.y = (position.y + velocity.y * elapsed) % self.height
+
+        if rotation is not None and rotation.speed:
+            position.rotation = math.remainder(
+                position.rotation + rotation.speed * elapsed, math.tau
+            )
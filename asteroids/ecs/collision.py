@@ -0,0 +1,242 @@
+import math
+from typing import Callable
+
+import numpy as np
+
+from .components import Asteroid, Bullet, Collidable, PlayerShip, Position
+from .enums import CollidableKind, CollisionLayer
+
+
+# the group marker component of the entities on each layer
+LAYER_GROUPS: dict[CollisionLayer, type] = {
+    CollisionLayer.PlayerShip: PlayerShip,
+    CollisionLayer.Asteroid: Asteroid,
+    CollisionLayer.Bullet: Bullet,
+}
+
+# for each layer, the layers its entities look for contacts with
+DEFAULT_MASKS: dict[CollisionLayer, CollisionLayer] = {
+    CollisionLayer.Bullet: CollisionLayer.Asteroid,
+    CollisionLayer.PlayerShip: CollisionLayer.Asteroid,
+}
+
+
+def layer_pairs(masks: dict[CollisionLayer, CollisionLayer]) -> list[tuple[type, type]]:
+    """
+    The (group, other group) marker components to find contacts between, in
+    layer order
+    """
+    return [
+        (LAYER_GROUPS[layer], LAYER_GROUPS[other])
+        for layer in CollisionLayer
+        for other in CollisionLayer
+        if masks.get(layer, CollisionLayer(0)) & other
+    ]
+
+
+def triangle_vertices(
+    pos: Position, collidable: Collidable
+) -> list[tuple[float, float]]:
+    """
+    Corners of an equilateral triangle `height` away from its position, the
+    first pointing along the entity's rotation plus the collidable's own
+    """
+    rotation = pos.rotation + collidable.rotation
+    height = collidable.height
+
+    # coordinate system is upside down
+    return [
+        (
+            pos.x + height * math.cos(rotation + turn),
+            pos.y - height * math.sin(rotation + turn),
+        )
+        for turn in (0.0, math.tau / 3, 2 * math.tau / 3)
+    ]
+
+
+def collide_circles(
+    pos1: Position, collidable1: Collidable, pos2: Position, collidable2: Collidable
+) -> bool:
+    delta_x = pos2.x - pos1.x
+    delta_y = pos2.y - pos1.y
+
+    reach = collidable1.radius + collidable2.radius
+
+    return delta_x * delta_x + delta_y * delta_y < reach * reach
+
+
+def collide_circle_triangle(
+    pos1: Position, collidable1: Collidable, pos2: Position, collidable2: Collidable
+) -> bool:
+    x, y = pos1.x, pos1.y
+    radius = collidable1.radius
+
+    # bounding circles apart, the common case
+    reach = radius + collidable2.height
+
+    if (pos2.x - x) ** 2 + (pos2.y - y) ** 2 >= reach * reach:
+        return False
+
+    vertices = triangle_vertices(pos2, collidable2)
+
+    if _contains(vertices, x, y):
+        return True
+
+    squared = radius * radius
+
+    return any(
+        _squared_segment_distance(x, y, *start, *end) < squared
+        for start, end in zip(vertices, vertices[1:] + vertices[:1])
+    )
+
+
+def collide_triangle_circle(
+    pos1: Position, collidable1: Collidable, pos2: Position, collidable2: Collidable
+) -> bool:
+    return collide_circle_triangle(pos2, collidable2, pos1, collidable1)
+
+
+def collide_triangles(
+    pos1: Position, collidable1: Collidable, pos2: Position, collidable2: Collidable
+) -> bool:
+    reach = collidable1.height + collidable2.height
+
+    if (pos2.x - pos1.x) ** 2 + (pos2.y - pos1.y) ** 2 >= reach * reach:
+        return False
+
+    first = triangle_vertices(pos1, collidable1)
+    second = triangle_vertices(pos2, collidable2)
+
+    # separating axis test, the edge normals of both triangles
+    for vertices in (first, second):
+        for (start_x, start_y), (end_x, end_y) in zip(
+            vertices, vertices[1:] + vertices[:1]
+        ):
+            axis_x, axis_y = start_y - end_y, end_x - start_x
+
+            first_projection = [axis_x * x + axis_y * y for x, y in first]
+            second_projection = [axis_x * x + axis_y * y for x, y in second]
+
+            if max(first_projection) <= min(second_projection) or max(
+                second_projection
+            ) <= min(first_projection):
+                return False
+
+    return True
+
+
+NARROWPHASE: dict[
+    tuple[CollidableKind, CollidableKind],
+    Callable[[Position, Collidable, Position, Collidable], bool],
+] = {
+    (CollidableKind.Circle, CollidableKind.Circle): collide_circles,
+    (CollidableKind.Circle, CollidableKind.Triangle): collide_circle_triangle,
+    (CollidableKind.Triangle, CollidableKind.Circle): collide_triangle_circle,
+    (CollidableKind.Triangle, CollidableKind.Triangle): collide_triangles,
+}
+
+
+def collide(
+    pos1: Position, collidable1: Collidable, pos2: Position, collidable2: Collidable
+) -> bool:
+    """
+    Whether the two collidables overlap, for any pair of kinds
+    """
+    return NARROWPHASE[collidable1.kind, collidable2.kind](
+        pos1, collidable1, pos2, collidable2
+    )
+
+
+def circle_hits(
+    first: np.ndarray, second: np.ndarray, *, same: bool = False, tile: int = 16_384
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Indices of the pairs of overlapping circles, one from `first` and one
+    from `second`, both (n, 3) arrays of x, y and radius, sorted by the index
+    into `first` then into `second`
+
+    Distances are compared a tile of about `tile` pairs at a time, so memory
+    stays bounded however many circles there are. Within a tile only the
+    pairs whose circles overlap along x have their squared distance worked
+    out.
+
+    same: both are the same circles, only pairs with the first index lower
+        than the second are returned
+    """
+    x, y, radius = np.ascontiguousarray(first.T)
+    other_x, other_y, other_radius = np.ascontiguousarray(second.T)
+
+    # whole rows when few enough, fewer tiles is less overhead
+    tile_rows = max(1, min(len(x), tile // max(len(other_x), 1)))
+    tile_columns = max(1, tile // tile_rows)
+
+    hits_first = []
+    hits_second = []
+
+    for start in range(0, len(x), tile_rows):
+        stop = start + tile_rows
+
+        for other_start in range(start if same else 0, len(other_x), tile_columns):
+            other_stop = other_start + tile_columns
+
+            delta_x = x[start:stop, None] - other_x[None, other_start:other_stop]
+            reach = (
+                radius[start:stop, None] + other_radius[None, other_start:other_stop]
+            )
+
+            rows, columns = np.nonzero(np.abs(delta_x) < reach)
+
+            delta_x = delta_x[rows, columns]
+            reach = reach[rows, columns]
+
+            rows += start
+            columns += other_start
+
+            delta_y = y[rows] - other_y[columns]
+
+            # the same test as collide_circles, so both find the same pairs
+            overlap = delta_x * delta_x + delta_y * delta_y < reach * reach
+
+            if same:
+                overlap &= rows < columns
+
+            hits_first.append(rows[overlap])
+            hits_second.append(columns[overlap])
+
+    if not hits_first:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+
+    hits_first = np.concatenate(hits_first)
+    hits_second = np.concatenate(hits_second)
+
+    order = np.lexsort((hits_second, hits_first))
+
+    return hits_first[order], hits_second[order]
+
+
+def _contains(vertices: list[tuple[float, float]], x: float, y: float) -> bool:
+    (ax, ay), (bx, by), (cx, cy) = vertices
+
+    first = (bx - ax) * (y - ay) - (by - ay) * (x - ax)
+    second = (cx - bx) * (y - by) - (cy - by) * (x - bx)
+    third = (ax - cx) * (y - cy) - (ay - cy) * (x - cx)
+
+    # on the same side of all three edges, whichever way they wind
+    return (first >= 0 and second >= 0 and third >= 0) or (
+        first <= 0 and second <= 0 and third <= 0
+    )
+
+
+def _squared_segment_distance(
+    x: float, y: float, start_x: float, start_y: float, end_x: float, end_y: float
+) -> float:
+    segment_x, segment_y = end_x - start_x, end_y - start_y
+    length = segment_x * segment_x + segment_y * segment_y
+
+    t = ((x - start_x) * segment_x + (y - start_y) * segment_y) / length
+    t = min(max(t, 0.0), 1.0)
+
+    closest_x = start_x + t * segment_x - x
+    closest_y = start_y + t * segment_y - y
+
+    return closest_x * closest_x + closest_y * closest_y
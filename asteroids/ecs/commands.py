@@ -0,0 +1,47 @@
+import esper
+
+
+class CommandBuffer:
+    """
+    Entity creations and deletions recorded by processors while they iterate
+    query results, applied together by World.flush_commands
+
+    Entities to create get their id straight away, e.g. to register them
+    with a pool. While the world is processing they only enter the database
+    on flush, with all their components at once, outside of it, e.g. when
+    populating a world between frames, they are inserted straight away and
+    can be used as soon as created. Deletions always wait for the flush, as
+    esper's do. Deleting an entity more than once is recorded once,
+    e.g. a bullet that both hits an asteroid and leaves the world on the same
+    frame.
+    """
+
+    def __init__(self, world: esper.World):
+        self.world = world
+
+        self.created: list[tuple[int, tuple]] = []
+        # an ordered set, so flushes run in the order deletes were recorded
+        self.deleted: dict[int, None] = {}
+
+    def __len__(self):
+        return len(self.created) + len(self.deleted)
+
+    def create(self, *components) -> int:
+        world = self.world
+
+        world._next_entity_id += 1
+        entity = world._next_entity_id
+
+        if world.processing:
+            self.created.append((entity, components))
+        else:
+            world._insert_entity(entity, {type(c): c for c in components})
+
+        return entity
+
+    def delete(self, entity: int):
+        self.deleted[entity] = None
+
+    def clear(self):
+        self.created.clear()
+        self.deleted.clear()
@@ -2,9 +2,10 @@ import dataclasses
 import math
 
 from .enums import CollidableKind, RenderableKind, ScoreEventKind
+from .spatial import SpatialHash
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Spawning:
     rate: float = 0.0
     elapsed: float = 0.0
@@ -17,17 +18,34 @@ class Spawning:
         return 1.0 / self.rate
 
 
-class Asteroid:
-    pass
+class Marker:
+    """
+    Stateless tag component, all entities share one instance per marker type
+    """
 
+    __slots__ = ()
 
-@dataclasses.dataclass
+    def __new__(cls):
+        instance = cls.__dict__.get("_instance")
+
+        if instance is None:
+            instance = super().__new__(cls)
+            cls._instance = instance
+
+        return instance
+
+
+class Asteroid(Marker):
+    __slots__ = ()
+
+
+@dataclasses.dataclass(slots=True)
 class PositionOffset:
     x: float = 0.0
     y: float = 0.0
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Position:
     x: float = 0.0
     y: float = 0.0
@@ -54,7 +72,7 @@ class Position:
             self.rotation += math.pi * 2
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Velocity:
     x: float = 0.0
     y: float = 0.0
@@ -90,19 +108,19 @@ class Velocity:
             self.y *= ratio
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Acceleration:
     x: float = 0.0
     y: float = 0.0
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Rotation:
     # radians / ms
     speed: float = 0.0
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class BulletAmmo:
     recharge_rate: float
     count: int
@@ -125,12 +143,11 @@ class BulletAmmo:
         return self.count == 0
 
 
-@dataclasses.dataclass
-class Bullet:
-    pass
+class Bullet(Marker):
+    __slots__ = ()
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Collidable:
     kind: CollidableKind
 
@@ -142,7 +159,23 @@ class Collidable:
     rotation: float = 0.0
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
+class Contacts:
+    """
+    Contacts found by the CollisionProcessor on the current frame, by the
+    group marker components of the entities, e.g. (Bullet, Asteroid), as
+    (entity, other entity, time) sorted by entity
+
+    time: when during the frame they first touched, from 0 at its start to 1
+        at its end, always 1 unless collisions are swept
+    """
+
+    pairs: dict[tuple[type, type], list[tuple[int, int, float]]] = dataclasses.field(
+        default_factory=dict
+    )
+
+
+@dataclasses.dataclass(slots=True)
 class ScoreTracker:
     scores: dict[ScoreEventKind, int] = dataclasses.field(
         default_factory=lambda: {kind: 0 for kind in ScoreEventKind}
@@ -150,16 +183,16 @@ class ScoreTracker:
     recent_events: list[ScoreEventKind] = dataclasses.field(default_factory=list)
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class PlayerKeyInput:
     keydowns: set[int] = dataclasses.field(default_factory=set)
 
 
-class PlayerShip:
-    pass
+class PlayerShip(Marker):
+    __slots__ = ()
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Renderable:
     kind: RenderableKind
 
@@ -176,11 +209,49 @@ class Renderable:
     offset: PositionOffset | None = None
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class RenderableCollection:
     items: list[Renderable]
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Lifetime:
     remaining: float = 0.0
+
+
+@dataclasses.dataclass(slots=True)
+class SpatialIndex:
+    """
+    Broadphase grids of collidable entities, one per group marker component
+    (e.g. Asteroid), rebuilt once per frame and shared by collision consumers
+
+    interest: optional grid of every drawn entity, by its drawn extent, to
+        find what is near a viewport or observer (area of interest)
+    """
+
+    grids: dict[type, SpatialHash] = dataclasses.field(default_factory=dict)
+    interest: SpatialHash | None = None
+
+
+@dataclasses.dataclass(slots=True)
+class WorldBounds:
+    """
+    Size of the world, entities wrap around at its edges
+    """
+
+    width: float
+    height: float
+
+
+@dataclasses.dataclass(slots=True)
+class Camera:
+    """
+    Viewport into the world, x and y are its top left corner in world
+    coordinates
+    """
+
+    x: float = 0.0
+    y: float = 0.0
+
+    width: float = 0.0
+    height: float = 0.0
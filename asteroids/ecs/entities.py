@@ -1,10 +1,8 @@
 import logging
-import random
 
 import esper
 
 
-from asteroids.constants import SCREEN_HEIGHT, SCREEN_WIDTH
 from asteroids.ecs.utils import get_offset_for_rotation
 
 from .components import (
@@ -12,24 +10,52 @@ from .components import (
     Asteroid,
     Bullet,
     BulletAmmo,
+    Camera,
     Collidable,
+    Contacts,
     PlayerKeyInput,
     Position,
     PositionOffset,
     RenderableCollection,
     ScoreTracker,
+    SpatialIndex,
     Velocity,
     Spawning,
     Renderable,
     PlayerShip,
     Rotation,
+    Lifetime,
+    WorldBounds,
 )
 from .enums import CollidableKind, RenderableKind, ScoreEventKind
+from .spatial import SpatialHash
 
 
 logger = logging.getLogger(__name__)
 
 
+def create_world_bounds(world: esper.World, width: float, height: float):
+    world_bounds = world.create_entity()
+
+    world.add_component(world_bounds, WorldBounds(width=width, height=height))
+
+    return world_bounds
+
+
+def get_world_bounds(world: esper.World) -> WorldBounds:
+    _, world_bounds = world.get_singleton(WorldBounds)
+
+    return world_bounds
+
+
+def create_camera(world: esper.World, width: float, height: float):
+    camera = world.create_entity()
+
+    world.add_component(camera, Camera(width=width, height=height))
+
+    return camera
+
+
 def create_scoreboard(world: esper.World):
     scoreboard = world.create_entity()
 
@@ -44,33 +70,66 @@ def create_spawner(world: esper.World):
     return spawner
 
 
+def create_spatial_index(
+    world: esper.World, cell_size: float = 64.0, *, interest: bool = False
+):
+    spatial_index = world.create_entity()
+
+    # asteroids are the only group queried today, but any marker component
+    # can be given its own grid
+    world.add_component(
+        spatial_index,
+        SpatialIndex(
+            grids={Asteroid: SpatialHash(cell_size)},
+            interest=SpatialHash(cell_size) if interest else None,
+        ),
+    )
+    world.add_component(spatial_index, Contacts())
+
+    return spatial_index
+
+
 def spawn_asteroid(world: esper.World):
-    asteroid = world.create_entity()
+    """
+    Created through world.commands, so when called from a processor the
+    asteroid is only in the database once that processor returns, between
+    frames straight away
+    """
+    recycle = world.pools.acquire("asteroid")
+    rng = world.random
+    world_bounds = get_world_bounds(world)
 
-    radius = random.randrange(10, 30)
+    radius = rng.randrange(10, 30)
 
     # TODO
     # random spawn point
-    position = Position(x=random.randrange(50, SCREEN_WIDTH - 50), y=0)
+    position = recycle(Position, x=rng.randrange(50, int(world_bounds.width) - 50), y=0)
 
-    velocity = Velocity(x=(random.random() - 0.5) / 50, y=random.random() / 50)
+    velocity = recycle(Velocity, x=(rng.random() - 0.5) / 50, y=rng.random() / 50)
 
     # random velocity
 
-    world.add_component(asteroid, Asteroid())
-    world.add_component(asteroid, velocity)
-    world.add_component(asteroid, position)
-    world.add_component(asteroid, Renderable(kind=RenderableKind.Circle, radius=radius))
-    world.add_component(asteroid, Collidable(radius=radius, kind=CollidableKind.Circle))
+    asteroid = world.commands.create(
+        recycle(Asteroid),
+        velocity,
+        position,
+        recycle(Renderable, kind=RenderableKind.Circle, radius=radius),
+        recycle(Collidable, radius=radius, kind=CollidableKind.Circle),
+    )
+
+    world.pools.register(asteroid, "asteroid")
 
     return asteroid
 
 
-def create_player_ship(world: esper.World):
+def create_player_ship(world: esper.World) -> int:
+    world_bounds = get_world_bounds(world)
     player_ship = world.create_entity()
 
     world.add_component(player_ship, PlayerShip())
-    world.add_component(player_ship, Position(x=SCREEN_WIDTH / 2, y=SCREEN_HEIGHT / 2))
+    world.add_component(
+        player_ship, Position(x=world_bounds.width / 2, y=world_bounds.height / 2)
+    )
     world.add_component(player_ship, Velocity(max=0.25))
     world.add_component(player_ship, Acceleration())
     world.add_component(player_ship, Rotation())
@@ -98,14 +157,32 @@ def create_player_ship(world: esper.World):
     )
     world.add_component(player_ship, renderables)
 
+    return player_ship
 
-def create_bullet(world: esper.World):
-    player, (
-        player_ship,
-        player_position,
-        player_velocity,
-        bullet_ammo,
-    ) = world.get_components(PlayerShip, Position, Velocity, BulletAmmo)[0]
+
+def get_player_components(
+    world: esper.World, player: int | None, *component_types: type
+) -> list:
+    """
+    Components of the given player ship, or of the only one when None
+    """
+    if player is None:
+        player, _ = world.get_singleton(PlayerShip)
+
+    return [
+        world.component_for_entity(player, component_type)
+        for component_type in component_types
+    ]
+
+
+def create_bullet(world: esper.World, player: int | None = None):
+    """
+    None when the player is out of ammo. Deferred like spawn_asteroid's
+    asteroids when called from a processor
+    """
+    player_position, bullet_ammo = get_player_components(
+        world, player, Position, BulletAmmo
+    )
 
     if bullet_ammo.empty:
         return
@@ -113,23 +190,42 @@ def create_bullet(world: esper.World):
     # subtract one bullet
     bullet_ammo.count -= 1
 
-    bullet = world.create_entity()
+    recycle = world.pools.acquire("bullet")
 
     offset = get_offset_for_rotation(player_position.rotation, magnitude=0.75)
 
-    velocity = Velocity(x=offset.x, y=offset.y)
-
-    world.add_component(bullet, Position(x=player_position.x, y=player_position.y))
-    world.add_component(bullet, velocity)
-    world.add_component(
-        bullet, Renderable(kind=RenderableKind.Circle, radius=3, color=(0, 0, 0))
+    bullet = world.commands.create(
+        recycle(Position, x=player_position.x, y=player_position.y),
+        recycle(Velocity, x=offset.x, y=offset.y),
+        recycle(Renderable, kind=RenderableKind.Circle, radius=3, color=(0, 0, 0)),
+        recycle(Collidable, radius=3, kind=CollidableKind.Circle),
+        recycle(Bullet),
     )
-    world.add_component(bullet, Collidable(radius=3, kind=CollidableKind.Circle))
-    world.add_component(bullet, Bullet())
+
+    world.pools.register(bullet, "bullet")
 
     return bullet
 
 
+def create_movement_trail(world: esper.World, position: Position):
+    """
+    Deferred like spawn_asteroid's asteroids when called from a processor
+    """
+    recycle = world.pools.acquire("trail")
+
+    trail = world.commands.create(
+        recycle(Position, x=position.x, y=position.y),
+        recycle(Lifetime, remaining=2.0 * 1_000.0),
+        recycle(
+            Renderable, kind=RenderableKind.Circle, color=(125, 125, 125), radius=3
+        ),
+    )
+
+    world.pools.register(trail, "trail")
+
+    return trail
+
+
 def create_player_input(world: esper.World):
     player_input = world.create_entity()
 
@@ -137,7 +233,7 @@ def create_player_input(world: esper.World):
 
 
 def track_score_event(world: esper.World, kind: ScoreEventKind):
-    _, score_tracker = world.get_component(ScoreTracker)[0]
+    _, score_tracker = world.get_singleton(ScoreTracker)
 
     score_tracker.recent_events.insert(0, kind)
     score_tracker.recent_events = score_tracker.recent_events[:10]
@@ -152,9 +248,13 @@ def increase_spawn_rate(world: esper.World, multiplier: float = 1.25):
 
 
 def set_player_acceleration(
-    world: esper.World, *, forward: bool = True, unset: bool = False
+    world: esper.World,
+    *,
+    forward: bool = True,
+    unset: bool = False,
+    player: int | None = None,
 ):
-    _, (_, pos, acc) = world.get_components(PlayerShip, Position, Acceleration)[0]
+    pos, acc = get_player_components(world, player, Position, Acceleration)
 
     if unset:
         acc.x = acc.y = 0.0
@@ -167,8 +267,8 @@ def set_player_acceleration(
         acc.y = offset.y * (1 if forward else -1)
 
 
-def set_player_rotating_right(world: esper.World, val: bool):
-    _, (_, rot) = world.get_components(PlayerShip, Rotation)[0]
+def set_player_rotating_right(world: esper.World, val: bool, player: int | None = None):
+    (rot,) = get_player_components(world, player, Rotation)
 
     if val:
         rot.speed = -1.0 / 500.0
@@ -176,8 +276,8 @@ def set_player_rotating_right(world: esper.World, val: bool):
         rot.speed = 0.0
 
 
-def set_player_rotating_left(world: esper.World, val: bool):
-    _, (_, rot) = world.get_components(PlayerShip, Rotation)[0]
+def set_player_rotating_left(world: esper.World, val: bool, player: int | None = None):
+    (rot,) = get_player_components(world, player, Rotation)
 
     if val:
         rot.speed = 1.0 / 500.0
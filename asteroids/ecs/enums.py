@@ -6,6 +6,17 @@ class CollidableKind(enum.IntEnum):
     Triangle = enum.auto()
 
 
+class CollisionLayer(enum.IntFlag):
+    """
+    Collision groups, masks of layers say which groups look for contacts
+    with which
+    """
+
+    PlayerShip = enum.auto()
+    Asteroid = enum.auto()
+    Bullet = enum.auto()
+
+
 class ScoreEventKind(enum.IntEnum):
     EnemyKill = enum.auto()
     Time = enum.auto()
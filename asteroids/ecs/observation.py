@@ -0,0 +1,239 @@
+import math
+
+import esper
+import numpy as np
+
+from .components import (
+    Asteroid,
+    Bullet,
+    BulletAmmo,
+    Collidable,
+    PlayerShip,
+    Position,
+    Velocity,
+)
+from .entities import get_player_components, get_world_bounds
+from .utils import get_collidable_extent
+
+
+# x, y, cos/sin of rotation, velocity x, y (of max), ammo (of max)
+PLAYER_FEATURES = 7
+
+# offset x, y from the player, velocity x, y (world sizes per second), radius,
+# and 1.0 when the row holds an entity
+ENTITY_FEATURES = 6
+
+
+class EntityBuffers:
+    """
+    Scratch arrays for the positions, velocities and extents of one group of
+    entities, grown when a frame has more entities than ever before
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.count = 0
+
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.radius = np.zeros(capacity)
+        self.distance = np.zeros(capacity)
+
+    def fill(self, world: esper.World, group: type):
+        count = 0
+
+        for _, (_, pos, vel, collidable) in world.get_components(
+            group, Position, Velocity, Collidable
+        ):
+            if count == self.capacity:
+                self._grow()
+
+            self.x[count] = pos.x
+            self.y[count] = pos.y
+            self.vx[count] = vel.x
+            self.vy[count] = vel.y
+            self.radius[count] = get_collidable_extent(collidable)
+
+            count += 1
+
+        self.count = count
+
+    def _grow(self):
+        self.capacity *= 2
+
+        for name in ("x", "y", "vx", "vy", "radius", "distance"):
+            old = getattr(self, name)
+            new = np.zeros(self.capacity)
+            new[: old.size] = old
+
+            setattr(self, name, new)
+
+
+class ObservationEncoder:
+    """
+    Packs the player ship and the entities nearest to it into one fixed-shape
+    float32 vector, optionally followed by low resolution occupancy grids
+
+    All arrays are allocated up front and reused, so encoding a frame does not
+    allocate anything proportional to the number of entities. The returned
+    array is overwritten by the next encode, copy it to keep it.
+
+    Positions and offsets are in units of the world's size, and offsets to
+    other entities take the shortest way around the wrapping world edges.
+    Nearest entities come first, unused rows are all zeros.
+
+    asteroids, bullets: how many of the nearest of each to include
+    grid: (columns, rows) of the occupancy grids, one for asteroids and one
+        for bullets, each cell 1.0 when an entity's center lies inside it
+    """
+
+    def __init__(
+        self,
+        *,
+        asteroids: int = 8,
+        bullets: int = 4,
+        grid: tuple[int, int] | None = None,
+        capacity: int = 256,
+    ):
+        self.grid_shape = grid
+
+        grid_size = 2 * grid[0] * grid[1] if grid else 0
+
+        self.size = (
+            PLAYER_FEATURES + (asteroids + bullets) * ENTITY_FEATURES + grid_size
+        )
+
+        self.buffer = np.zeros(self.size, dtype=np.float32)
+
+        # named views on the buffer
+        end = PLAYER_FEATURES
+        self.player = self.buffer[:end]
+
+        start, end = end, end + asteroids * ENTITY_FEATURES
+        self.asteroids = self.buffer[start:end].reshape(asteroids, ENTITY_FEATURES)
+
+        start, end = end, end + bullets * ENTITY_FEATURES
+        self.bullets = self.buffer[start:end].reshape(bullets, ENTITY_FEATURES)
+
+        self.grid = self.buffer[end:].reshape(2, grid[1], grid[0]) if grid else None
+
+        self.asteroid_buffers = EntityBuffers(capacity)
+        self.bullet_buffers = EntityBuffers(capacity)
+
+        self.cells = np.zeros(capacity, dtype=np.intp)
+
+    def encode(self, world: esper.World, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        out: copy the observation into this array as well, e.g. a row of a
+            batch of observations
+        """
+        pos, vel, bullet_ammo = get_player_components(
+            world, None, Position, Velocity, BulletAmmo
+        )
+
+        world_bounds = get_world_bounds(world)
+        width, height = world_bounds.width, world_bounds.height
+
+        player = self.player
+
+        player[0] = pos.x / width
+        player[1] = pos.y / height
+        player[2] = math.cos(pos.rotation)
+        player[3] = math.sin(pos.rotation)
+        player[4] = vel.x / vel.max
+        player[5] = vel.y / vel.max
+        player[6] = bullet_ammo.count / bullet_ammo.max
+
+        self.asteroid_buffers.fill(world, Asteroid)
+        self.bullet_buffers.fill(world, Bullet)
+
+        if self.grid is not None:
+            self._rasterize(self.asteroid_buffers, self.grid[0], width, height)
+            self._rasterize(self.bullet_buffers, self.grid[1], width, height)
+
+        self._encode_nearest(self.asteroid_buffers, self.asteroids, pos, width, height)
+        self._encode_nearest(self.bullet_buffers, self.bullets, pos, width, height)
+
+        if out is not None:
+            out[:] = self.buffer
+
+        return self.buffer
+
+    @staticmethod
+    def _encode_nearest(
+        buffers: EntityBuffers,
+        rows: np.ndarray,
+        pos: Position,
+        width: float,
+        height: float,
+    ):
+        rows.fill(0.0)
+
+        count = buffers.count
+
+        if not count:
+            return
+
+        # offsets from the player, wrapped into [-size / 2, size / 2)
+        dx, dy = buffers.x[:count], buffers.y[:count]
+
+        for offsets, origin, size in (
+            (dx, pos.x, width),
+            (dy, pos.y, height),
+        ):
+            offsets -= origin - size / 2
+            np.mod(offsets, size, out=offsets)
+            offsets -= size / 2
+
+        distance = buffers.distance[:count]
+        np.hypot(dx, dy, out=distance)
+
+        # a few argmin passes select the nearest without sorting or allocating
+        for row in rows[: min(count, len(rows))]:
+            index = distance.argmin()
+
+            row[0] = dx[index] / width
+            row[1] = dy[index] / height
+            row[2] = buffers.vx[index] * 1_000 / width
+            row[3] = buffers.vy[index] * 1_000 / height
+            row[4] = buffers.radius[index] / width
+            row[5] = 1.0
+
+            distance[index] = np.inf
+
+    def _rasterize(
+        self, buffers: EntityBuffers, grid: np.ndarray, width: float, height: float
+    ):
+        """
+        Mark the cells holding entity centers, reads the positions before
+        _encode_nearest turns them into offsets
+        """
+        grid.fill(0.0)
+
+        count = buffers.count
+
+        if not count:
+            return
+
+        if self.cells.size < buffers.capacity:
+            self.cells = np.zeros(buffers.capacity, dtype=np.intp)
+
+        rows, columns = grid.shape
+
+        # distance is free scratch space until _encode_nearest runs
+        scratch = buffers.distance[:count]
+        cells = self.cells[:count]
+
+        np.multiply(buffers.y[:count], rows / height, out=scratch)
+        np.clip(scratch, 0, rows - 1, out=scratch)
+        np.floor(scratch, out=scratch)
+        scratch *= columns
+        np.copyto(cells, scratch, casting="unsafe")
+
+        np.multiply(buffers.x[:count], columns / width, out=scratch)
+        np.clip(scratch, 0, columns - 1, out=scratch)
+        np.add(cells, scratch, out=cells, casting="unsafe")
+
+        grid.reshape(-1)[cells] = 1.0
@@ -0,0 +1,98 @@
+class EntityPool:
+    """
+    Components of dead entities of one archetype, kept around for reuse
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+
+        self.free: list[dict[type, object]] = []
+
+        self.reused = 0
+        self.allocated = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self.free)
+
+    def acquire(self) -> "Recycler":
+        if self.free:
+            self.reused += 1
+            return Recycler(self.free.pop())
+
+        self.allocated += 1
+        return Recycler({})
+
+    def release(self, components: dict[type, object]):
+        if len(self.free) < self.capacity:
+            self.free.append(components)
+        else:
+            self.dropped += 1
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "free": len(self.free),
+            "reused": self.reused,
+            "allocated": self.allocated,
+            "dropped": self.dropped,
+        }
+
+
+class Recycler:
+    """
+    Hands out the recycled components of one dead entity, re-initialized in
+    place, or new ones when there is nothing of that type to recycle
+    """
+
+    def __init__(self, components: dict[type, object]):
+        self.components = components
+
+    def __call__(self, component_type: type, **fields):
+        component = self.components.get(component_type)
+
+        # array-backed views are owned by their store, never reused
+        if type(component) is not component_type:
+            return component_type(**fields)
+
+        component.__init__(**fields)
+
+        return component
+
+
+class EntityPools:
+    """
+    Per-archetype pools, and which pool each live pooled entity returns to
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+
+        self.pools: dict[str, EntityPool] = {}
+        self.owners: dict[int, EntityPool] = {}
+
+    def __getitem__(self, archetype: str) -> EntityPool:
+        pool = self.pools.get(archetype)
+
+        if pool is None:
+            pool = self.pools[archetype] = EntityPool(self.capacity)
+
+        return pool
+
+    def acquire(self, archetype: str) -> Recycler:
+        return self[archetype].acquire()
+
+    def register(self, entity: int, archetype: str):
+        self.owners[entity] = self[archetype]
+
+    def release(self, entity: int, components: dict[type, object]):
+        pool = self.owners.pop(entity, None)
+
+        if pool is not None:
+            pool.release(components)
+
+    def clear(self):
+        self.owners.clear()
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {archetype: pool.stats for archetype, pool in self.pools.items()}
@@ -0,0 +1,133 @@
+import collections
+import json
+import time
+
+import esper
+
+from .scheduling import run_processor
+
+
+def summarize(samples) -> dict:
+    """
+    Mean, p99 and most recent value of a series of seconds, in milliseconds
+    """
+    if not samples:
+        return {"mean_ms": 0.0, "p99_ms": 0.0, "last_ms": 0.0}
+
+    ordered = sorted(samples)
+
+    return {
+        "mean_ms": sum(ordered) / len(ordered) * 1_000,
+        "p99_ms": ordered[round((len(ordered) - 1) * 0.99)] * 1_000,
+        "last_ms": samples[-1] * 1_000,
+    }
+
+
+class Profiler:
+    """
+    Records wall time per processor and entity counts per component type for
+    the most recent `capacity` frames
+    """
+
+    def __init__(self, capacity: int = 300):
+        self.capacity = capacity
+        self.frames = 0
+
+        self.frame_times = collections.deque(maxlen=capacity)
+        self.processor_times: dict[str, collections.deque] = {}
+        self.entity_counts: dict[str, collections.deque] = {}
+
+    def _series(self, table: dict, name: str) -> collections.deque:
+        series = table.get(name)
+
+        if series is None:
+            series = table[name] = collections.deque(maxlen=self.capacity)
+
+        return series
+
+    def process(self, world: esper.World, *args, **kwargs):
+        """
+        Drop-in replacement for World._process that times every processor
+        """
+        perf_counter = time.perf_counter
+        processor_times = self.processor_times
+
+        frame_start = start = perf_counter()
+
+        for processor in world._processors:
+            run_processor(processor, *args, **kwargs)
+
+            world.flush_commands()
+
+            end = perf_counter()
+
+            self._series(processor_times, type(processor).__name__).append(end - start)
+
+            start = end
+
+        self.frame_times.append(start - frame_start)
+
+        self.count_entities(world)
+
+        self.frames += 1
+
+    def record(
+        self, world: esper.World, processor_times: dict[str, float], frame_time: float
+    ):
+        """
+        Record a frame whose processors were timed elsewhere, e.g. when run in
+        parallel
+        """
+        for name, seconds in processor_times.items():
+            self._series(self.processor_times, name).append(seconds)
+
+        self.frame_times.append(frame_time)
+
+        self.count_entities(world)
+
+        self.frames += 1
+
+    def count_entities(self, world: esper.World):
+        counts = {
+            component_type.__name__: len(entities)
+            for component_type, entities in world._components.items()
+        }
+
+        # component types with no entities left are dropped by esper
+        for name in self.entity_counts.keys() - counts.keys():
+            self.entity_counts[name].append(0)
+
+        for name, count in counts.items():
+            self._series(self.entity_counts, name).append(count)
+
+    def processor_summary(self) -> dict[str, dict]:
+        return {
+            name: summarize(samples) for name, samples in self.processor_times.items()
+        }
+
+    def frame_summary(self) -> dict:
+        return summarize(self.frame_times)
+
+    def latest_entity_counts(self) -> dict[str, int]:
+        return {name: counts[-1] for name, counts in self.entity_counts.items()}
+
+    def dump(self, path: str):
+        """
+        Write every recorded sample as JSON, timings are in milliseconds
+        """
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "frames": self.frames,
+                    "frame_ms": [t * 1_000 for t in self.frame_times],
+                    "processors_ms": {
+                        name: [t * 1_000 for t in samples]
+                        for name, samples in self.processor_times.items()
+                    },
+                    "entity_counts": {
+                        name: list(counts)
+                        for name, counts in self.entity_counts.items()
+                    },
+                },
+                f,
+            )
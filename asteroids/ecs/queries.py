@@ -0,0 +1,186 @@
+import collections
+import threading
+
+
+class Query:
+    """
+    The entities having all of some component types, with their components,
+    kept up to date as components are added and removed
+
+    Results are ordered by entity, so they do not depend on the order
+    entities were created, parked or restored in.
+
+    single: results are (entity, component) like esper's get_component,
+        otherwise (entity, [components]) like get_components
+    """
+
+    __slots__ = (
+        "component_types",
+        "single",
+        "matches",
+        "results",
+        "last",
+        "sorted",
+        "lock",
+    )
+
+    def __init__(self, component_types: tuple[type, ...], single: bool):
+        self.component_types = component_types
+        self.single = single
+
+        # entity -> component, or list of components
+        self.matches: dict[int, object] = {}
+
+        # built from matches when asked for, dropped when they change
+        self.results: list[tuple] | None = None
+
+        self.last = 0
+        self.sorted = True
+
+        # guards building results, see QueryCache
+        self.lock = threading.Lock()
+
+    def add(self, entity: int, components: dict[type, object]):
+        """
+        Match the entity again after one of its components was added or
+        replaced
+        """
+        try:
+            if self.single:
+                (component_type,) = self.component_types
+                match = components[component_type]
+            else:
+                match = [components[t] for t in self.component_types]
+        except KeyError:
+            return
+
+        if entity not in self.matches:
+            if entity < self.last:
+                self.sorted = False
+            else:
+                self.last = entity
+
+        self.matches[entity] = match
+        self.results = None
+
+    def discard(self, entity: int):
+        if self.matches.pop(entity, None) is not None:
+            self.results = None
+
+    def get(self) -> list[tuple]:
+        results = self.results
+
+        if results is None:
+            with self.lock:
+                results = self.results
+
+                if results is None:
+                    if not self.sorted:
+                        self.matches = dict(sorted(self.matches.items()))
+                        self.sorted = True
+
+                    # a new list, those handed out before may still be iterated
+                    results = self.results = list(self.matches.items())
+
+        return results
+
+
+class QueryCache:
+    """
+    Queries by component signature, updated incrementally as components are
+    added and removed instead of all being thrown away on every change
+
+    Only the queries involving a changed component type are touched, so
+    creating a bullet leaves e.g. the ScoreTracker query as it was.
+
+    Processors of a ParallelScheduler stage may ask for the same query at
+    once, so queries are created, and their results built, under a lock.
+    Matches only change when components are added or removed, which
+    processors that may run at the same time do not do to the same types.
+    """
+
+    def __init__(self):
+        # component type, or tuple of types for get_components -> query
+        self.queries: dict[object, Query] = {}
+
+        # component type -> queries involving it
+        self.by_type: dict[type, list[Query]] = collections.defaultdict(list)
+
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.queries)
+
+    def get(
+        self,
+        key: object,
+        component_types: tuple[type, ...],
+        single: bool,
+        entities: dict[int, dict[type, object]],
+        owners: dict[type, set[int]],
+    ) -> Query:
+        query = self.queries.get(key)
+
+        if query is None:
+            with self.lock:
+                query = self.queries.get(key)
+
+                if query is None:
+                    query = self._create(component_types, single, entities, owners)
+
+                    # only once complete, it is looked up without the lock
+                    self.queries[key] = query
+
+        return query
+
+    def _create(
+        self,
+        component_types: tuple[type, ...],
+        single: bool,
+        entities: dict[int, dict[type, object]],
+        owners: dict[type, set[int]],
+    ) -> Query:
+        query = Query(component_types, single)
+
+        try:
+            matching = set.intersection(*[owners[t] for t in component_types])
+        except KeyError:
+            matching = ()
+
+        for entity in sorted(matching):
+            query.add(entity, entities[entity])
+
+        for component_type in component_types:
+            self.by_type[component_type].append(query)
+
+        return query
+
+    def added(self, entity: int, components: dict[type, object], component_type: type):
+        for query in self.by_type.get(component_type, ()):
+            query.add(entity, components)
+
+    def inserted(self, entity: int, components: dict[type, object]):
+        """
+        Match a new entity, added with all its components at once
+        """
+        by_type = self.by_type
+
+        for component_type in components:
+            for query in by_type.get(component_type, ()):
+                if entity not in query.matches:
+                    query.add(entity, components)
+
+    def removed(self, entity: int, component_type: type):
+        for query in self.by_type.get(component_type, ()):
+            query.discard(entity)
+
+    def deleted(self, entity: int, components: dict[type, object]):
+        by_type = self.by_type
+
+        for component_type in components:
+            for query in by_type.get(component_type, ()):
+                query.discard(entity)
+
+    def clear(self):
+        self.queries.clear()
+        self.by_type.clear()
@@ -0,0 +1,198 @@
+import concurrent.futures
+import time
+
+import esper
+
+
+class Schedule:
+    """
+    Runs something every `every` frames, with the delta accumulated over the
+    frames since its previous run
+
+    phase: offset of the frames it runs on, so that schedules with the same
+        rate can take turns instead of all running on the same frame
+    """
+
+    def __init__(self, every: int = 1, phase: int = 0):
+        if every < 1:
+            raise ValueError(f"Expected every >= 1, got {every}")
+
+        self.every = every
+        self.frame = phase % every
+        self.pending = 0.0
+
+    def advance(self, delta: float) -> float | None:
+        """
+        The accumulated delta on frames it runs, None on the others
+        """
+        self.pending += delta
+        self.frame += 1
+
+        if self.frame < self.every:
+            return None
+
+        delta, self.pending = self.pending, 0.0
+        self.frame = 0
+
+        return delta
+
+
+def run_processor(processor: esper.Processor, *args, **kwargs):
+    """
+    Run the processor, or skip it on frames its schedule does not run, see
+    World.add_processor
+    """
+    schedule = getattr(processor, "schedule", None)
+
+    if schedule is None:
+        processor.process(*args, **kwargs)
+        return
+
+    delta = schedule.advance(kwargs["delta"])
+
+    if delta is not None:
+        processor.process(*args, **{**kwargs, "delta": delta})
+
+
+class Entities:
+    """
+    Stands for the world's entity ids in processor `writes`, processors that
+    create entities declare it so they keep their order, and the ids they get
+    """
+
+
+def _declared(processor: esper.Processor) -> tuple[set, set] | None:
+    reads = getattr(processor, "reads", None)
+    writes = getattr(processor, "writes", None)
+
+    if reads is None and writes is None:
+        return None
+
+    return set(reads or ()), set(writes or ())
+
+
+def conflicts(first: esper.Processor, second: esper.Processor) -> bool:
+    """
+    Whether the processors may not run at the same time, undeclared ones
+    conflict with every other
+    """
+    first_access, second_access = _declared(first), _declared(second)
+
+    if first_access is None or second_access is None:
+        return True
+
+    if getattr(first, "main_thread", False) and getattr(second, "main_thread", False):
+        return True
+
+    first_reads, first_writes = first_access
+    second_reads, second_writes = second_access
+
+    return bool(
+        first_writes & (second_reads | second_writes) or second_writes & first_reads
+    )
+
+
+def build_stages(processors: list[esper.Processor]) -> list[list[esper.Processor]]:
+    """
+    Group processors into stages that run one after another, each processor
+    going into the stage after the last one holding a processor it conflicts
+    with, so conflicting processors keep their order
+    """
+    stages: list[list[esper.Processor]] = []
+    levels: list[int] = []
+
+    for index, processor in enumerate(processors):
+        level = max(
+            (
+                levels[earlier] + 1
+                for earlier in range(index)
+                if conflicts(processors[earlier], processor)
+            ),
+            default=0,
+        )
+
+        levels.append(level)
+
+        if level == len(stages):
+            stages.append([])
+
+        stages[level].append(processor)
+
+    # processors that must stay on the main thread go first, which runs there
+    for stage in stages:
+        stage.sort(key=lambda processor: not getattr(processor, "main_thread", False))
+
+    return stages
+
+
+class ParallelScheduler:
+    """
+    Runs processors whose declared component `reads` and `writes` do not
+    conflict at the same time, on a thread pool
+
+    Processors declare the component types they read and write as class
+    attributes, creating entities counts as writing Entities and the created
+    components. Deletions go through the world's command buffer, flushed
+    after each stage, so need no declaration. Processors without
+    declarations run on their own.
+
+    Stages are worked out again whenever the world's processors change. The
+    first processor of every stage runs on the calling thread, as do those
+    flagged `main_thread`, e.g. for drawing.
+
+    Threads only run at the same time when processors release the GIL, as
+    NumPy does for large arrays, or on free-threaded Python builds.
+    """
+
+    def __init__(self, workers: int | None = None):
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="processor"
+        )
+
+        self.processors: list[esper.Processor] = []
+        self.stages: list[list[esper.Processor]] = []
+
+    def run(self, world: esper.World, *args, **kwargs):
+        if world._processors != self.processors:
+            self.processors = list(world._processors)
+            self.stages = build_stages(self.processors)
+
+        profiler = getattr(world, "profiler", None)
+        times = {} if profiler is not None else None
+
+        frame_start = time.perf_counter()
+
+        for first, *others in self.stages:
+            futures = [
+                self.executor.submit(_run_timed, processor, times, args, kwargs)
+                for processor in others
+            ]
+
+            try:
+                _run_timed(first, times, args, kwargs)
+            finally:
+                # re-raises the first exception of the others
+                for future in futures:
+                    future.result()
+
+            world.flush_commands()
+
+        if profiler is not None:
+            profiler.record(world, times, time.perf_counter() - frame_start)
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+
+def _run_timed(
+    processor: esper.Processor, times: dict[str, float] | None, args, kwargs
+):
+    if times is None:
+        run_processor(processor, *args, **kwargs)
+        return
+
+    start = time.perf_counter()
+
+    run_processor(processor, *args, **kwargs)
+
+    times[type(processor).__name__] = time.perf_counter() - start
@@ -0,0 +1,559 @@
+import mmap
+import operator
+import struct
+from typing import Callable
+
+import esper
+import numpy as np
+
+from .components import (
+    Acceleration,
+    Asteroid,
+    Bullet,
+    BulletAmmo,
+    Camera,
+    Collidable,
+    Contacts,
+    Lifetime,
+    PlayerKeyInput,
+    PlayerShip,
+    Position,
+    PositionOffset,
+    Renderable,
+    RenderableCollection,
+    Rotation,
+    ScoreTracker,
+    SpatialIndex,
+    Spawning,
+    Velocity,
+    WorldBounds,
+)
+from .enums import CollidableKind, RenderableKind, ScoreEventKind
+from .spatial import SpatialHash
+
+
+MAGIC = b"ASSN"
+VERSION = 3
+
+# magic, version, section count
+HEADER = struct.Struct("<4sHH")
+# section name, byte offset, record count
+SECTION = struct.Struct("<24sQQ")
+
+# sections start at multiples of this, so records can be viewed in place
+ALIGNMENT = 8
+
+# scores kept as floats, the others are counts
+FLOAT_SCORES = {ScoreEventKind.Time}
+
+# groups a SpatialIndex may have a grid for
+SPATIAL_GROUPS = (Asteroid, Bullet, PlayerShip)
+# placeholder groups for the area of interest grid and an index without grids
+INTEREST_GROUP = 254
+NO_GRIDS = 255
+
+RECENT_EVENTS = 10
+
+# faster than calling the enums
+COLLIDABLE_KINDS = {kind.value: kind for kind in CollidableKind}
+RENDERABLE_KINDS = {kind.value: kind for kind in RenderableKind}
+
+WORLD = np.dtype(
+    [
+        ("next_entity_id", "<i8"),
+        ("random_version", "<i8"),
+        ("has_gauss_next", "?"),
+        ("gauss_next", "<f8"),
+    ]
+)
+
+RENDERABLE_FIELDS = [
+    ("kind", "u1"),
+    ("color", "u1", 3),
+    ("radius", "<f8"),
+    ("height", "<f8"),
+    ("rotation", "<f8"),
+    ("has_offset", "?"),
+    ("offset_x", "<f8"),
+    ("offset_y", "<f8"),
+]
+
+
+class Codec:
+    """
+    How to store one component type as records of a NumPy structured dtype
+
+    encode gives the records of one component, decode builds the component
+    back from its record, or from the list of its records when a component
+    may have several. Those always have at least one, so empty containers
+    encode to a single placeholder record.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        component_type: type,
+        fields: list,
+        encode: Callable[[object], list[tuple]],
+        decode: Callable[[tuple | list[tuple]], object],
+        *,
+        multiple: bool = False,
+    ):
+        self.name = name
+        self.component_type = component_type
+        self.encode = encode
+        self.decode = decode
+        self.multiple = multiple
+
+        self.names = [field[0] for field in fields]
+        self.dtype = np.dtype([("entity", "<i8")] + fields)
+
+
+def _encode_renderable(renderable: Renderable) -> tuple:
+    offset = renderable.offset
+
+    return (
+        renderable.kind,
+        renderable.color,
+        renderable.radius,
+        renderable.height,
+        renderable.rotation,
+        offset is not None,
+        offset.x if offset else 0.0,
+        offset.y if offset else 0.0,
+    )
+
+
+def _decode_renderable(record: tuple) -> Renderable:
+    kind, color, radius, height, rotation, has_offset, offset_x, offset_y = record
+
+    return Renderable(
+        kind=RENDERABLE_KINDS[kind],
+        color=tuple(color),
+        radius=radius,
+        height=height,
+        rotation=rotation,
+        offset=PositionOffset(x=offset_x, y=offset_y) if has_offset else None,
+    )
+
+
+def _encode_score_tracker(score_tracker: ScoreTracker) -> list[tuple]:
+    recent = [int(kind) for kind in score_tracker.recent_events[:RECENT_EVENTS]]
+
+    return [
+        (
+            [score_tracker.scores[kind] for kind in ScoreEventKind],
+            recent + [0] * (RECENT_EVENTS - len(recent)),
+            len(recent),
+        )
+    ]
+
+
+def _decode_score_tracker(record: tuple) -> ScoreTracker:
+    scores, recent, recent_count = record
+
+    return ScoreTracker(
+        scores={
+            kind: score if kind in FLOAT_SCORES else int(score)
+            for kind, score in zip(ScoreEventKind, scores)
+        },
+        recent_events=[ScoreEventKind(kind) for kind in recent[:recent_count]],
+    )
+
+
+def _encode_spatial_index(spatial_index: SpatialIndex) -> list[tuple]:
+    records = [
+        (SPATIAL_GROUPS.index(group), grid.cell_size)
+        for group, grid in spatial_index.grids.items()
+    ]
+
+    if spatial_index.interest is not None:
+        records.append((INTEREST_GROUP, spatial_index.interest.cell_size))
+
+    return records or [(NO_GRIDS, 0.0)]
+
+
+def _decode_spatial_index(records: list[tuple]) -> SpatialIndex:
+    spatial_index = SpatialIndex()
+
+    for group, cell_size in records:
+        if group == INTEREST_GROUP:
+            spatial_index.interest = SpatialHash(cell_size)
+        elif group != NO_GRIDS:
+            spatial_index.grids[SPATIAL_GROUPS[group]] = SpatialHash(cell_size)
+
+    return spatial_index
+
+
+def _simple(name: str, component_type: type, fields: list) -> Codec:
+    """
+    Codec for dataclasses of plain numbers, stored field by field
+    """
+    get = operator.attrgetter(*[field[0] for field in fields])
+
+    # attrgetter of several names already gives a tuple
+    def encode(component) -> list[tuple]:
+        return [get(component)]
+
+    def encode_one(component) -> list[tuple]:
+        return [(get(component),)]
+
+    def decode(record: tuple):
+        return component_type(*record)
+
+    return Codec(
+        name, component_type, fields, encode_one if len(fields) == 1 else encode, decode
+    )
+
+
+def _marker(name: str, component_type: type) -> Codec:
+    return Codec(
+        name,
+        component_type,
+        [],
+        lambda component: [()],
+        lambda record: component_type(),
+    )
+
+
+CODECS = [
+    _simple("Position", Position, [("x", "<f8"), ("y", "<f8"), ("rotation", "<f8")]),
+    _simple("Velocity", Velocity, [("x", "<f8"), ("y", "<f8"), ("max", "<f8")]),
+    _simple("Acceleration", Acceleration, [("x", "<f8"), ("y", "<f8")]),
+    _simple("Rotation", Rotation, [("speed", "<f8")]),
+    _simple("Spawning", Spawning, [("rate", "<f8"), ("elapsed", "<f8")]),
+    _simple("Lifetime", Lifetime, [("remaining", "<f8")]),
+    _simple("WorldBounds", WorldBounds, [("width", "<f8"), ("height", "<f8")]),
+    _simple(
+        "Camera",
+        Camera,
+        [("x", "<f8"), ("y", "<f8"), ("width", "<f8"), ("height", "<f8")],
+    ),
+    _simple(
+        "BulletAmmo",
+        BulletAmmo,
+        [
+            ("recharge_rate", "<f8"),
+            ("count", "<i8"),
+            ("max", "<i8"),
+            ("elapsed", "<f8"),
+        ],
+    ),
+    Codec(
+        "Collidable",
+        Collidable,
+        [("kind", "u1"), ("radius", "<f8"), ("height", "<f8"), ("rotation", "<f8")],
+        lambda c: [(c.kind, c.radius, c.height, c.rotation)],
+        lambda record: Collidable(COLLIDABLE_KINDS[record[0]], *record[1:]),
+    ),
+    Codec(
+        "Renderable",
+        Renderable,
+        RENDERABLE_FIELDS,
+        lambda renderable: [_encode_renderable(renderable)],
+        _decode_renderable,
+    ),
+    # one record per item, kind 0 marks an empty collection
+    Codec(
+        "RenderableCollection",
+        RenderableCollection,
+        RENDERABLE_FIELDS,
+        lambda collection: [_encode_renderable(item) for item in collection.items]
+        or [(0, (0, 0, 0), 0.0, 0.0, 0.0, False, 0.0, 0.0)],
+        lambda records: RenderableCollection(
+            items=[_decode_renderable(record) for record in records if record[0]]
+        ),
+        multiple=True,
+    ),
+    Codec(
+        "ScoreTracker",
+        ScoreTracker,
+        [
+            ("scores", "<f8", len(ScoreEventKind)),
+            ("recent", "u1", RECENT_EVENTS),
+            ("recent_count", "u1"),
+        ],
+        _encode_score_tracker,
+        _decode_score_tracker,
+    ),
+    # one record per held key, key -1 marks the component itself
+    Codec(
+        "PlayerKeyInput",
+        PlayerKeyInput,
+        [("key", "<i8")],
+        lambda key_input: [(-1,)] + [(key,) for key in sorted(key_input.keydowns)],
+        lambda records: PlayerKeyInput(
+            keydowns={key for (key,) in records if key != -1}
+        ),
+        multiple=True,
+    ),
+    # grids are rebuilt every frame, only which ones exist is kept
+    Codec(
+        "SpatialIndex",
+        SpatialIndex,
+        [("group", "u1"), ("cell_size", "<f8")],
+        _encode_spatial_index,
+        _decode_spatial_index,
+        multiple=True,
+    ),
+    # found again every frame
+    _marker("Contacts", Contacts),
+    _marker("Asteroid", Asteroid),
+    _marker("Bullet", Bullet),
+    _marker("PlayerShip", PlayerShip),
+]
+
+CODECS_BY_TYPE = {codec.component_type: codec for codec in CODECS}
+
+
+def _processor_state(processor) -> list[float]:
+    """
+    The processor's snapshot_fields, then the state of its schedule if any,
+    then the count and values of its snapshot_state if it has one
+    """
+    values = [
+        getattr(processor, field) for field in getattr(processor, "snapshot_fields", ())
+    ]
+
+    schedule = getattr(processor, "schedule", None)
+
+    if schedule is not None:
+        values += [schedule.frame, schedule.pending]
+
+    snapshot_state = getattr(processor, "snapshot_state", None)
+
+    if snapshot_state is not None:
+        state = snapshot_state()
+        values += [len(state), *state]
+
+    return values
+
+
+def _section_name(name: str) -> bytes:
+    encoded = name.encode()
+
+    if len(encoded) > 24:
+        raise ValueError(f"Section name too long: {name}")
+
+    return encoded
+
+
+class Snapshot:
+    """
+    The complete state of a world as NumPy record arrays, one per component
+    type plus the world's own state, that can be restored into any world
+    with the same processors
+
+    Serialized snapshots are the sections back to back behind a table of
+    contents, so loading views the records in place without copying. Pooled
+    components and spatial grids are not kept, as they are rebuilt as needed.
+    """
+
+    def __init__(self, sections: dict[str, np.ndarray]):
+        self.sections = sections
+
+    @classmethod
+    def capture(cls, world: esper.World) -> "Snapshot":
+        # parked entities live outside the database
+        if getattr(world, "chunks", None) is not None:
+            raise ValueError("Snapshots of chunked worlds are not supported")
+
+        # records are sorted by entity, so equal states give equal bytes
+        records: dict[str, list[tuple]] = {}
+
+        for component_type, entities in world._components.items():
+            codec = CODECS_BY_TYPE.get(component_type)
+
+            if codec is None:
+                raise TypeError(f"No snapshot codec for {component_type.__name__}")
+
+            rows = records[codec.name] = []
+
+            for entity in sorted(entities):
+                component = world._entities[entity][component_type]
+
+                for record in codec.encode(component):
+                    rows.append((entity, *record))
+
+        sections = {
+            codec.name: np.array(records[codec.name], dtype=codec.dtype)
+            for codec in CODECS
+            if codec.name in records
+        }
+
+        version, state, gauss_next = world.random.getstate()
+
+        sections["_world"] = np.array(
+            [
+                (
+                    world._next_entity_id,
+                    version,
+                    gauss_next is not None,
+                    gauss_next or 0.0,
+                )
+            ],
+            dtype=WORLD,
+        )
+        sections["_random"] = np.array(state, dtype="<u4")
+        sections["_entities"] = np.array(sorted(world._entities), dtype="<i8")
+        sections["_dead"] = np.array(sorted(world._dead_entities), dtype="<i8")
+        sections["_processors"] = np.array(
+            [
+                value
+                for processor in world._processors
+                for value in _processor_state(processor)
+            ],
+            dtype="<f8",
+        )
+
+        return cls(sections)
+
+    def restore(self, world: esper.World):
+        """
+        Replace everything in the world with the snapshot's state
+        """
+        sections = self.sections
+
+        entities = {entity: {} for entity in sections["_entities"].tolist()}
+        components = {}
+
+        for codec in CODECS:
+            array = sections.get(codec.name)
+
+            if array is None:
+                continue
+
+            component_type = codec.component_type
+            decode = codec.decode
+
+            owners = array["entity"].tolist()
+            names = codec.names
+
+            # markers have no fields
+            records = array[names].tolist() if names else [()] * len(owners)
+
+            if not codec.multiple:
+                for entity, record in zip(owners, records):
+                    entities[entity][component_type] = decode(record)
+
+                components[component_type] = owners
+
+                continue
+
+            # group consecutive records of the same entity
+            owners = components[component_type] = []
+            current, group = None, []
+
+            for entity, record in zip(array["entity"].tolist(), records):
+                if entity != current and group:
+                    entities[current][component_type] = decode(group)
+                    owners.append(current)
+
+                    group = []
+
+                current = entity
+                group.append(record)
+
+            if group:
+                entities[current][component_type] = decode(group)
+                owners.append(current)
+
+        ((next_entity_id, version, has_gauss_next, gauss_next),) = sections[
+            "_world"
+        ].tolist()
+
+        world.load_database(
+            entities, components, next_entity_id, sections["_dead"].tolist()
+        )
+
+        world.random.setstate(
+            (
+                version,
+                tuple(sections["_random"].tolist()),
+                gauss_next if has_gauss_next else None,
+            )
+        )
+
+        values = iter(sections["_processors"].tolist())
+
+        for processor in world._processors:
+            for field in getattr(processor, "snapshot_fields", ()):
+                setattr(processor, field, next(values))
+
+            schedule = getattr(processor, "schedule", None)
+
+            if schedule is not None:
+                schedule.frame = int(next(values))
+                schedule.pending = next(values)
+
+            if getattr(processor, "snapshot_state", None) is not None:
+                count = int(next(values))
+                processor.restore_snapshot_state([next(values) for _ in range(count)])
+
+    def to_bytes(self) -> bytes:
+        header_size = HEADER.size + SECTION.size * len(self.sections)
+
+        table = [HEADER.pack(MAGIC, VERSION, len(self.sections))]
+        chunks = []
+
+        offset = header_size
+
+        for name, array in self.sections.items():
+            padding = -offset % ALIGNMENT
+            chunks.append(b"\x00" * padding)
+            offset += padding
+
+            table.append(SECTION.pack(_section_name(name), offset, len(array)))
+
+            data = array.tobytes()
+            chunks.append(data)
+            offset += len(data)
+
+        return b"".join(table + chunks)
+
+    @classmethod
+    def from_buffer(cls, buffer) -> "Snapshot":
+        """
+        Records are views on the buffer, which must outlive the snapshot
+        """
+        magic, version, count = HEADER.unpack_from(buffer)
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a version {VERSION} snapshot")
+
+        dtypes = {codec.name: codec.dtype for codec in CODECS}
+        dtypes.update(
+            _world=WORLD,
+            _random=np.dtype("<u4"),
+            _entities=np.dtype("<i8"),
+            _dead=np.dtype("<i8"),
+            _processors=np.dtype("<f8"),
+        )
+
+        sections = {}
+
+        for index in range(count):
+            name, offset, length = SECTION.unpack_from(
+                buffer, HEADER.size + SECTION.size * index
+            )
+            name = name.rstrip(b"\x00").decode()
+
+            sections[name] = np.frombuffer(
+                buffer, dtype=dtypes[name], count=length, offset=offset
+            )
+
+        return cls(sections)
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "Snapshot":
+        """
+        Memory-map the file, records are paged in as they are read
+        """
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return cls.from_buffer(buffer)
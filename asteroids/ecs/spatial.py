@@ -0,0 +1,135 @@
+import math
+from typing import Any, Iterator
+
+import numpy as np
+
+
+class SpatialHash:
+    """
+    Uniform grid broadphase
+
+    Entries are bucketed by the cell containing their center, which keeps
+    rebuilding the grid every frame cheap. Queries widen the searched area by
+    the largest radius inserted so far, so entries overlapping a cell border
+    are never missed.
+
+    Entries are also kept in insertion order with their bounding circles, for
+    vectorized tests against all of them, see arrays.
+    """
+
+    def __init__(self, cell_size: float = 64.0):
+        self.cell_size = cell_size
+        self.cells: dict[tuple[int, int], list[tuple[int, Any]]] = {}
+        self.max_radius = 0.0
+
+        self.entries: list[tuple[int, Any]] = []
+        # x, y, radius of each entry
+        self.circles: list[tuple[float, float, float]] = []
+        self.circle_array: np.ndarray | None = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.cells.clear()
+        self.max_radius = 0.0
+
+        self.entries.clear()
+        self.circles.clear()
+        self.circle_array = None
+
+    def insert(self, entity: int, x: float, y: float, radius: float, *data):
+        size = self.cell_size
+        key = (int(x // size), int(y // size))
+        entry = (entity, *data)
+
+        bucket = self.cells.get(key)
+
+        if bucket is None:
+            self.cells[key] = [entry]
+        else:
+            bucket.append(entry)
+
+        if radius > self.max_radius:
+            self.max_radius = radius
+
+        self.entries.append(entry)
+        self.circles.append((x, y, radius))
+        self.circle_array = None
+
+    def arrays(self) -> tuple[list[tuple[int, Any]], np.ndarray]:
+        """
+        Entries in insertion order, and an (n, 3) array of the x, y and radius
+        they were inserted with
+        """
+        if self.circle_array is None:
+            self.circle_array = np.array(self.circles, dtype=np.float64).reshape(-1, 3)
+
+        return self.entries, self.circle_array
+
+    def query(self, x: float, y: float, radius: float) -> list[tuple]:
+        """
+        Entries whose bounding circle may overlap the given circle
+        """
+        return self.query_rect(x - radius, y - radius, x + radius, y + radius)
+
+    def query_rect(
+        self, left: float, top: float, right: float, bottom: float
+    ) -> list[tuple]:
+        """
+        Entries whose bounding circle may overlap the given rectangle, e.g. a
+        viewport
+        """
+        cells = self.cells
+        size = self.cell_size
+        reach = self.max_radius
+
+        min_x = int((left - reach) // size)
+        max_x = int((right + reach) // size)
+        min_y = int((top - reach) // size)
+        max_y = int((bottom + reach) // size)
+
+        found = []
+
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                bucket = cells.get((cell_x, cell_y))
+
+                if bucket is not None:
+                    found.extend(bucket)
+
+        return found
+
+    def pairs(self, margin: float = 0.0) -> Iterator[tuple[tuple, tuple]]:
+        """
+        Pairs of entries whose bounding circles may overlap, each pair once,
+        e.g. to find collisions within a group
+
+        Cheaper than querying around every entry, as each pair of cells is
+        visited once.
+
+        margin: also pair entries this much further apart
+        """
+        cells = self.cells
+        span = max(math.ceil((2 * self.max_radius + margin) / self.cell_size), 1)
+
+        # the cells after each cell, so that every pair of cells is visited once
+        offsets = [
+            (offset_x, offset_y)
+            for offset_x in range(-span, span + 1)
+            for offset_y in range(span + 1)
+            if offset_y > 0 or offset_x > 0
+        ]
+
+        for (cell_x, cell_y), bucket in cells.items():
+            for index, first in enumerate(bucket):
+                for second in bucket[index + 1 :]:
+                    yield first, second
+
+            for offset_x, offset_y in offsets:
+                other = cells.get((cell_x + offset_x, cell_y + offset_y))
+
+                if other is not None:
+                    for first in bucket:
+                        for second in other:
+                            yield first, second
@@ -0,0 +1,311 @@
+import math
+
+import numpy as np
+
+from .components import Acceleration, Position, Rotation, Velocity
+
+
+def _array_field(name: str):
+    def get(self):
+        return getattr(self._store, name).item(self._slot)
+
+    def set(self, value):
+        getattr(self._store, name)[self._slot] = value
+
+    return property(get, set)
+
+
+class PositionView(Position):
+    """
+    Position whose fields live in a KinematicsStore
+    """
+
+    x = _array_field("x")
+    y = _array_field("y")
+    rotation = _array_field("rotation")
+
+    __slots__ = ("_store", "_slot")
+
+    def __init__(self, store: "KinematicsStore", slot: int):
+        self._store = store
+        self._slot = slot
+
+
+class VelocityView(Velocity):
+    """
+    Velocity whose fields live in a KinematicsStore
+    """
+
+    x = _array_field("vx")
+    y = _array_field("vy")
+    max = _array_field("vmax")
+
+    __slots__ = ("_store", "_slot")
+
+    def __init__(self, store: "KinematicsStore", slot: int):
+        self._store = store
+        self._slot = slot
+
+
+class AccelerationView(Acceleration):
+    """
+    Acceleration whose fields live in a KinematicsStore
+    """
+
+    x = _array_field("ax")
+    y = _array_field("ay")
+
+    __slots__ = ("_store", "_slot")
+
+    def __init__(self, store: "KinematicsStore", slot: int):
+        self._store = store
+        self._slot = slot
+
+
+class RotationView(Rotation):
+    """
+    Rotation whose fields live in a KinematicsStore
+    """
+
+    speed = _array_field("spin")
+
+    __slots__ = ("_store", "_slot")
+
+    def __init__(self, store: "KinematicsStore", slot: int):
+        self._store = store
+        self._slot = slot
+
+
+# component type -> (presence mask, component field -> array, view class)
+LAYOUT = {
+    Position: (
+        "has_position",
+        {"x": "x", "y": "y", "rotation": "rotation"},
+        PositionView,
+    ),
+    Velocity: (
+        "has_velocity",
+        {"x": "vx", "y": "vy", "max": "vmax"},
+        VelocityView,
+    ),
+    Acceleration: ("has_acceleration", {"x": "ax", "y": "ay"}, AccelerationView),
+    Rotation: ("has_rotation", {"speed": "spin"}, RotationView),
+}
+
+FLOAT_ARRAYS = ("x", "y", "rotation", "vx", "vy", "vmax", "ax", "ay", "spin")
+MASK_ARRAYS = ("has_position", "has_velocity", "has_acceleration", "has_rotation")
+
+
+class KinematicsStore:
+    """
+    Struct-of-arrays storage for Position, Velocity, Acceleration and Rotation
+
+    Every entity owning one of these components gets a dense slot; slots
+    [0, size) are always in use so whole-store operations work on contiguous
+    array slices. Unused fields are kept at zero.
+    """
+
+    component_types = tuple(LAYOUT)
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self.size = 0
+
+        for name in FLOAT_ARRAYS:
+            setattr(self, name, np.zeros(capacity, dtype=np.float64))
+
+        for name in MASK_ARRAYS:
+            setattr(self, name, np.zeros(capacity, dtype=bool))
+
+        self.entities = np.zeros(capacity, dtype=np.int64)
+
+        self.slots: dict[int, int] = {}
+        self.views: list[list] = []
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self):
+        self.capacity *= 2
+
+        for name in FLOAT_ARRAYS + MASK_ARRAYS + ("entities",):
+            old = getattr(self, name)
+            new = np.zeros(self.capacity, dtype=old.dtype)
+            new[: self.size] = old[: self.size]
+
+            setattr(self, name, new)
+
+    def _slot_for(self, entity: int) -> int:
+        slot = self.slots.get(entity)
+
+        if slot is None:
+            if self.size == self.capacity:
+                self._grow()
+
+            slot = self.size
+            self.size += 1
+
+            self.entities[slot] = entity
+            self.slots[entity] = slot
+            self.views.append([])
+
+        return slot
+
+    def attach(self, entity: int, component):
+        """
+        Copy the component into the entity's slot, return a view on it
+        """
+        mask, fields, view_class = LAYOUT[type(component)]
+
+        slot = self._slot_for(entity)
+
+        getattr(self, mask)[slot] = True
+
+        for field, name in fields.items():
+            getattr(self, name)[slot] = getattr(component, field)
+
+        view = view_class(self, slot)
+        self.views[slot].append(view)
+
+        return view
+
+    def detach(self, entity: int, component_type: type):
+        slot = self.slots[entity]
+        mask, fields, view_class = LAYOUT[component_type]
+
+        getattr(self, mask)[slot] = False
+
+        for name in fields.values():
+            getattr(self, name)[slot] = 0.0
+
+        self.views[slot] = [
+            view for view in self.views[slot] if type(view) is not view_class
+        ]
+
+        if not any(getattr(self, name)[slot] for name in MASK_ARRAYS):
+            self.release(entity)
+
+    def release(self, entity: int):
+        """
+        Free the entity's slot, moving the last slot into the hole
+        """
+        slot = self.slots.pop(entity, None)
+
+        if slot is None:
+            return
+
+        last = self.size - 1
+
+        if slot != last:
+            for name in FLOAT_ARRAYS + MASK_ARRAYS + ("entities",):
+                array = getattr(self, name)
+                array[slot] = array[last]
+
+            moved = int(self.entities[slot])
+            self.slots[moved] = slot
+
+            for view in self.views[last]:
+                view._slot = slot
+
+            self.views[slot] = self.views[last]
+
+        for name in FLOAT_ARRAYS + MASK_ARRAYS:
+            getattr(self, name)[last] = 0
+
+        self.views.pop()
+        self.size = last
+
+    def clear(self):
+        for name in FLOAT_ARRAYS + MASK_ARRAYS:
+            getattr(self, name)[: self.size] = 0
+
+        self.size = 0
+        self.slots.clear()
+        self.views.clear()
+
+    def integrate(self, delta: float, width: float, height: float):
+        """
+        Vectorized equivalent of MovementProcessor for every slot
+        """
+        n = self.size
+
+        x, y, rotation = self.x[:n], self.y[:n], self.rotation[:n]
+        vx, vy, vmax = self.vx[:n], self.vy[:n], self.vmax[:n]
+        has_position = self.has_position[:n]
+        has_velocity = self.has_velocity[:n]
+
+        # update rotation
+        rotating = self.has_rotation[:n] & has_position
+
+        rotation += self.spin[:n] * delta
+        rotation[rotating & (rotation > math.pi)] -= math.pi * 2
+        rotation[rotating & (rotation < -math.pi)] += math.pi * 2
+
+        # update velocity, unused acceleration fields are zero
+        vx += self.ax[:n] * delta
+        vy += self.ay[:n] * delta
+
+        speed = np.hypot(vx, vy)
+        clamped = self.has_acceleration[:n] & has_velocity & (speed > vmax)
+        ratio = vmax[clamped] / speed[clamped]
+
+        vx[clamped] *= ratio
+        vy[clamped] *= ratio
+
+        # update position, unused velocity fields are zero
+        x += vx * delta
+        y += vy * delta
+
+        # handle screen crossings
+        moving = has_position & has_velocity
+
+        over_x, under_x = moving & (x > width), moving & (x < 0.0)
+        over_y, under_y = moving & (y > height), moving & (y < 0.0)
+
+        x[over_x] = 0.0
+        x[under_x] = width
+        y[over_y] = 0.0
+        y[under_y] = height
+
+
+class KinematicsPartition:
+    """
+    One world's share of a KinematicsStore used by several worlds at once
+
+    Entities are keyed as (partition index, entity) in the shared store, since
+    every world numbers its entities from 1. The owner of the shared store
+    integrates it once for all partitions, so integrate() here does nothing.
+    """
+
+    def __init__(self, store: KinematicsStore, index: int):
+        self.store = store
+        self.offset = index << 32
+
+        self.component_types = store.component_types
+
+    def __len__(self):
+        return sum(1 for key in self.store.slots if key >> 32 == self.offset >> 32)
+
+    def key(self, entity: int) -> int:
+        return self.offset | entity
+
+    def slot(self, entity: int) -> int:
+        return self.store.slots[self.offset | entity]
+
+    def attach(self, entity: int, component):
+        return self.store.attach(self.offset | entity, component)
+
+    def detach(self, entity: int, component_type: type):
+        self.store.detach(self.offset | entity, component_type)
+
+    def release(self, entity: int):
+        self.store.release(self.offset | entity)
+
+    def clear(self):
+        index = self.offset >> 32
+
+        for key in [key for key in self.store.slots if key >> 32 == index]:
+            self.store.release(key)
+
+    def integrate(self, delta: float, width: float, height: float):
+        pass
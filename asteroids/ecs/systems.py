@@ -1,6 +1,9 @@
+import itertools
 import logging
+import operator
 
 import esper
+import numpy as np
 import pygame
 import pygame.constants
 
@@ -12,7 +15,9 @@ from .components import (
     Asteroid,
     Bullet,
     BulletAmmo,
+    Camera,
     Collidable,
+    Contacts,
     Lifetime,
     PlayerKeyInput,
     PlayerShip,
@@ -23,37 +28,175 @@ from .components import (
     Spawning,
     Renderable,
     ScoreTracker,
+    SpatialIndex,
+    WorldBounds,
 )
 from .entities import (
     create_bullet,
+    create_movement_trail,
+    get_player_components,
+    get_world_bounds,
     set_player_acceleration,
     set_player_rotating_left,
     set_player_rotating_right,
     spawn_asteroid,
     track_score_event,
 )
-from .enums import RenderableKind, ScoreEventKind, InputEventKind, PlayerActionKind
-from .ui import render
-from .utils import check_collision
+from .collision import DEFAULT_MASKS, NARROWPHASE, circle_hits, layer_pairs
+from .enums import (
+    CollidableKind,
+    CollisionLayer,
+    InputEventKind,
+    PlayerActionKind,
+    ScoreEventKind,
+)
+from .profiling import Profiler
+from .scheduling import Entities, Schedule
+from .spatial import SpatialHash
+from .ui import SpriteCache, TextCache, render
+from .utils import check_swept_collision, get_collidable_extent, get_render_extent
 
 
 logger = logging.getLogger(__name__)
 
 
-def add_systems(world: esper.World):
-    world.add_processor(MovementProcessor())
-    world.add_processor(RenderingProcessor())
+def add_systems(
+    world: esper.World,
+    *,
+    render: bool = True,
+    dirty_rects: bool = False,
+    level_of_detail: bool = False,
+    swept_collisions: bool = False,
+    collision_masks: dict[CollisionLayer, CollisionLayer] | None = None,
+):
+    """
+    level_of_detail: move entities far from player ships and bullets, and
+        age trails, only every few frames
+    swept_collisions: hit asteroids that bullets passed through between
+        frames, see CollisionProcessor
+    collision_masks: which collision layers look for contacts with which,
+        see CollisionProcessor
+    """
+    every = 4 if level_of_detail else 1
+
+    if getattr(world, "chunks", None) is not None:
+        world.add_processor(ChunkProcessor())
+
+    world.add_processor(MovementProcessor(far_every=every))
+    world.add_processor(SpatialIndexProcessor())
+    world.add_processor(
+        CollisionProcessor(masks=collision_masks, swept=swept_collisions)
+    )
+
+    if render:
+        world.add_processor(CameraProcessor())
+        world.add_processor(RenderingProcessor(dirty_rects=dirty_rects))
+
     world.add_processor(SpawningProcessor())
     world.add_processor(BulletProcessor())
     world.add_processor(PlayerInputProcessor())
     world.add_processor(ScoreTimeTrackerProcessor())
     world.add_processor(BulletAmmoProcessor())
     world.add_processor(PlayerMovementVisualEffectProcessor())
-    world.add_processor(LifetimeProcessor())
+    world.add_processor(LifetimeProcessor(), every=every)
+
+
+class ChunkProcessor(esper.Processor):
+    """
+    Parks entities that left the chunks around player ships in the world's
+    ChunkGrid, and puts back those whose chunk became active again
+
+    Bullets and other short-lived entities are deleted rather than parked.
+    It moves entities in and out of the database, so declares no reads and
+    writes and always runs on its own.
+    """
+
+    def process(self, *args, delta, **kwargs):
+        world = self.world
+        chunks = world.chunks
+
+        activated = chunks.activate(
+            (pos.x, pos.y) for _, (_, pos) in world.get_components(PlayerShip, Position)
+        )
+
+        for ent, pos in world.get_component(Position):
+            if chunks.key(pos.x, pos.y) in chunks.active:
+                continue
+
+            if world.has_component(ent, PlayerShip):
+                continue
+
+            # deleted since the dead were cleared, e.g. between frames,
+            # parking would take it out from under the next clear
+            if not world.entity_exists(ent):
+                continue
+
+            if world.has_component(ent, Bullet) or world.has_component(ent, Lifetime):
+                world.commands.delete(ent)
+            else:
+                chunks.park(ent, world.park_entity(ent))
+
+        for key in activated:
+            for ent, components in chunks.unpark(key):
+                world.restore_entity(ent, components)
+
+        for ent, components in chunks.step():
+            world.restore_entity(ent, components)
+
+        chunks.time += delta
+
+
+def _move(pos: Position, vel: Velocity, elapsed: float, width: float, height: float):
+    pos.x += vel.x * elapsed
+    pos.y += vel.y * elapsed
+
+    if pos.x > width:
+        pos.x = 0.0
+    elif pos.x < 0.0:
+        pos.x = width
+
+    if pos.y > height:
+        pos.y = 0.0
+    elif pos.y < 0.0:
+        pos.y = height
 
 
 class MovementProcessor(esper.Processor):
+    """
+    far_every: move entities away from every player ship and bullet only
+        every this many frames, by the time accumulated since
+    near_distance: entities in the coarse cells of this size around a player
+        ship or bullet, and their neighbours, are near. At half the screen
+        width or more, everything on screen is near and moves every frame.
+
+    Array storage always integrates every entity, that is cheap already.
+    Which entities are far is kept in world snapshots, see snapshot_state.
+    """
+
+    reads = (WorldBounds, Acceleration, Rotation, PlayerShip, Bullet)
+    writes = (Position, Velocity)
+
+    def __init__(self, *, far_every: int = 1, near_distance: float = 400.0):
+        super().__init__()
+
+        self.far_every = far_every
+        self.near_distance = near_distance
+
+        self.far_schedule = Schedule(far_every)
+
+        # as of the last time far entities moved
+        self.far_entities: set[int] = set()
+
     def process(self, *args, delta, **kwargs):
+        kinematics = getattr(self.world, "kinematics", None)
+        world_bounds = get_world_bounds(self.world)
+        width, height = world_bounds.width, world_bounds.height
+
+        # array-backed storage, integrate every entity at once
+        if kinematics is not None:
+            kinematics.integrate(delta, width, height)
+            return
+
         # update rotation
         for _, (rot, pos) in self.world.get_components(Rotation, Position):
             pos.rotation += rot.speed * delta
@@ -66,25 +209,163 @@ class MovementProcessor(esper.Processor):
 
             vel.clamp()
 
+        if self.far_every > 1:
+            self.move_by_distance(delta, width, height)
+            return
+
         # update position
         for ent, (vel, pos) in self.world.get_components(Velocity, Position):
             pos.x += vel.x * delta
             pos.y += vel.y * delta
 
             # TODO this might need to be a separate processor
-            # handle screen crossings
-            if pos.x > SCREEN_WIDTH:
+            # handle world edge crossings
+            if pos.x > width:
                 pos.x = 0.0
             elif pos.x < 0.0:
-                pos.x = SCREEN_WIDTH
+                pos.x = width
 
-            if pos.y > SCREEN_HEIGHT:
+            if pos.y > height:
                 pos.y = 0.0
             elif pos.y < 0.0:
-                pos.y = SCREEN_WIDTH
+                pos.y = height
+
+    def snapshot_state(self) -> list[float]:
+        """
+        The far schedule, and the entities far as of the last time far ones
+        moved
+        """
+        schedule = self.far_schedule
+
+        return [schedule.frame, schedule.pending, *sorted(self.far_entities)]
+
+    def restore_snapshot_state(self, values: list[float]):
+        frame, pending, *far = values
+
+        self.far_schedule.frame = int(frame)
+        self.far_schedule.pending = pending
+        self.far_entities = set(map(int, far))
+
+    def move_by_distance(self, delta: float, width: float, height: float):
+        """
+        Position update, every frame for player ships, bullets and entities
+        near them, and every far_every frames for the others
+
+        Entities are sorted into near and far by which coarse cell they are
+        in whenever the far ones move. Those created since are near until
+        then, so they move from their first frame.
+        """
+        size = self.near_distance
+
+        anchors = set()
+        near = set()
+
+        for group in (PlayerShip, Bullet):
+            for ent, (_, vel, pos) in self.world.get_components(
+                group, Velocity, Position
+            ):
+                _move(pos, vel, delta, width, height)
+
+                anchors.add(ent)
+
+                column, row = int(pos.x // size), int(pos.y // size)
+
+                for i in (column - 1, column, column + 1):
+                    for j in (row - 1, row, row + 1):
+                        near.add((i, j))
+
+        far_delta = self.far_schedule.advance(delta)
+        was_far = self.far_entities
+
+        if far_delta is None:
+            for ent, (vel, pos) in self.world.get_components(Velocity, Position):
+                if ent not in anchors and ent not in was_far:
+                    _move(pos, vel, delta, width, height)
+
+            return
+
+        far_entities = self.far_entities = set()
+
+        for ent, (vel, pos) in self.world.get_components(Velocity, Position):
+            if ent in anchors:
+                continue
+
+            # near ones, and those created since, already moved until now
+            _move(pos, vel, far_delta if ent in was_far else delta, width, height)
+
+            if (int(pos.x // size), int(pos.y // size)) not in near:
+                far_entities.add(ent)
+
+
+class SpatialIndexProcessor(esper.Processor):
+    reads = (
+        Asteroid,
+        Bullet,
+        PlayerShip,
+        Collidable,
+        Position,
+        Renderable,
+        RenderableCollection,
+    )
+    writes = (SpatialIndex,)
+
+    def process(self, *args, **kwargs):
+        for _, spatial_index in self.world.get_component(SpatialIndex):
+            for group, grid in spatial_index.grids.items():
+                grid.clear()
+
+                for ent, (_, collidable, pos) in self.world.get_components(
+                    group, Collidable, Position
+                ):
+                    grid.insert(
+                        ent,
+                        pos.x,
+                        pos.y,
+                        get_collidable_extent(collidable),
+                        pos,
+                        collidable,
+                    )
+
+            interest = spatial_index.interest
+
+            if interest is None:
+                continue
+
+            interest.clear()
+
+            # entries hold everything needed to draw the entity, grouped
+            # renderables are flagged as they are drawn on top
+            for ent, (renderable, pos) in self.world.get_components(
+                Renderable, Position
+            ):
+                interest.insert(
+                    ent,
+                    pos.x,
+                    pos.y,
+                    get_render_extent(renderable),
+                    pos,
+                    (renderable,),
+                    False,
+                )
+
+            for ent, (renderables, pos) in self.world.get_components(
+                RenderableCollection, Position
+            ):
+                interest.insert(
+                    ent,
+                    pos.x,
+                    pos.y,
+                    max(map(get_render_extent, renderables.items), default=0.0),
+                    pos,
+                    renderables.items,
+                    True,
+                )
 
 
 class SpawningProcessor(esper.Processor):
+    reads = (WorldBounds,)
+    writes = (Spawning, Entities, Asteroid, Position, Velocity, Renderable, Collidable)
+
     def process(self, *args, delta, **kwargs):
         for ent, spawning in self.world.get_component(Spawning):
             spawning.elapsed += delta
@@ -97,62 +378,189 @@ class SpawningProcessor(esper.Processor):
                 spawning.elapsed = 0.0
 
 
+class CameraProcessor(esper.Processor):
+    reads = (WorldBounds, PlayerShip, Position)
+    writes = (Camera,)
+
+    def process(self, *args, screen, **kwargs):
+        world_bounds = get_world_bounds(self.world)
+
+        for _, camera in self.world.get_component(Camera):
+            camera.width, camera.height = screen.get_size()
+
+            # centered on the player ship, without showing past the world edges
+            for _, (_, pos) in self.world.get_components(PlayerShip, Position):
+                camera.x = min(
+                    max(pos.x - camera.width / 2, 0.0),
+                    max(world_bounds.width - camera.width, 0.0),
+                )
+                camera.y = min(
+                    max(pos.y - camera.height / 2, 0.0),
+                    max(world_bounds.height - camera.height, 0.0),
+                )
+
+                break
+
+
 class RenderingProcessor(esper.Processor):
-    def __init__(self) -> None:
+    reads = (
+        Camera,
+        SpatialIndex,
+        Renderable,
+        RenderableCollection,
+        Position,
+        ScoreTracker,
+        PlayerShip,
+        BulletAmmo,
+    )
+    writes = ()
+
+    # pygame's display belongs to the main thread
+    main_thread = True
+
+    background = (255, 255, 255)
+
+    def __init__(self, *, dirty_rects: bool = False) -> None:
+        """
+        dirty_rects: only clear and present the areas drawn this frame or the
+            previous one, instead of filling and flipping the whole screen
+        """
         super().__init__()
 
         self.font = pygame.font.SysFont("Comic", 40)
+        self.profiler_font = pygame.font.SysFont("Comic", 20)
+
+        self.sprites = SpriteCache()
+
+        self.hud_text = TextCache(self.font)
+        self.profiler_text = TextCache(self.profiler_font)
+
+        self.dirty_rects = dirty_rects
+        self.previous_rects: list[pygame.Rect] | None = None
+        self.background_surface = pygame.Surface((0, 0))
 
     def process(self, *args, **kwargs):
         show_fps = kwargs["show_fps"]
+        show_profiler = kwargs.get("show_profiler", False)
         screen = kwargs["screen"]
         clock = kwargs["clock"]
 
-        screen.fill((255, 255, 255))
+        if self.previous_rects is None:
+            screen.fill(self.background)
+        else:
+            # copying from a plain background surface clears every rect in a
+            # single call, unlike one fill per rect
+            if self.background_surface.get_size() != screen.get_size():
+                self.background_surface = pygame.Surface(screen.get_size())
+                self.background_surface.fill(self.background)
+
+            screen.blits(
+                [(self.background_surface, rect, rect) for rect in self.previous_rects],
+                doreturn=False,
+            )
 
-        # simple renderables
-        for ent, (renderable, pos) in self.world.get_components(Renderable, Position):
-            render(screen, renderable, pos)
+        blits = []
 
-        # grouped renderables
-        for _, (renderables, pos) in self.world.get_components(
-            RenderableCollection, Position
-        ):
-            for renderable in renderables.items:
-                render(screen, renderable, pos)
+        # world coordinates of the screen's top left corner
+        origin = (0.0, 0.0)
 
-        _, score_tracker = self.world.get_component(ScoreTracker)[0]
-        _, (_, bullet_ammo) = self.world.get_components(PlayerShip, BulletAmmo)[0]
+        for _, camera in self.world.get_component(Camera):
+            origin = (camera.x, camera.y)
 
-        time_str = f"Time {score_tracker.scores[ScoreEventKind.Time]:.1f}"
-        screen.blit(
-            self.font.render(time_str, True, pygame.Color(0, 0, 0)),
-            (SCREEN_WIDTH - 150, 0),
-        )
+        interest = None
+
+        for _, spatial_index in self.world.get_component(SpatialIndex):
+            interest = spatial_index.interest
+
+        if interest is not None:
+            # only what may be inside the viewport
+            width, height = screen.get_size()
+            visible = interest.query_rect(
+                origin[0], origin[1], origin[0] + width, origin[1] + height
+            )
+
+            for grouped in (False, True):
+                for _, pos, renderables, is_group in visible:
+                    if is_group is grouped:
+                        for renderable in renderables:
+                            render(blits, self.sprites, renderable, pos, origin)
+        else:
+            # simple renderables
+            for ent, (renderable, pos) in self.world.get_components(
+                Renderable, Position
+            ):
+                render(blits, self.sprites, renderable, pos, origin)
+
+            # grouped renderables
+            for _, (renderables, pos) in self.world.get_components(
+                RenderableCollection, Position
+            ):
+                for renderable in renderables.items:
+                    render(blits, self.sprites, renderable, pos, origin)
+
+        _, score_tracker = self.world.get_singleton(ScoreTracker)
+        (bullet_ammo,) = get_player_components(self.world, None, BulletAmmo)
+
+        # whole seconds, so the text only changes once a second
+        time_str = f"Time {int(score_tracker.scores[ScoreEventKind.Time])}"
+        blits.append((self.hud_text.render("time", time_str), (SCREEN_WIDTH - 150, 0)))
 
         kills_str = f"Kills {score_tracker.scores[ScoreEventKind.EnemyKill]}"
-        screen.blit(
-            self.font.render(kills_str, True, pygame.Color(0, 0, 0)),
-            (SCREEN_WIDTH - 150, 24),
+        blits.append(
+            (self.hud_text.render("kills", kills_str), (SCREEN_WIDTH - 150, 24))
         )
 
         ammo_str = f"Ammo {bullet_ammo.count}"
-        screen.blit(
-            self.font.render(ammo_str, True, pygame.Color(0, 0, 0)),
-            (SCREEN_WIDTH - 150, 48),
-        )
+        blits.append((self.hud_text.render("ammo", ammo_str), (SCREEN_WIDTH - 150, 48)))
 
         if show_fps:
-            fps_str = f"{clock.get_fps():.1f}"
+            fps_str = f"{clock.get_fps():.0f}"
 
-            fps_overlay = self.font.render(fps_str, True, pygame.Color(0, 0, 0))
+            blits.append((self.hud_text.render("fps", fps_str), (0, 0)))
+
+        profiler = getattr(self.world, "profiler", None)
+
+        if show_profiler and profiler is not None:
+            self.render_profiler(blits, profiler)
+
+        rects = screen.blits(blits, doreturn=self.dirty_rects)
+
+        if self.previous_rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.previous_rects + rects)
+
+        if self.dirty_rects:
+            self.previous_rects = rects
+
+    def render_profiler(self, blits: list, profiler: Profiler):
+        """
+        Per-processor frame time breakdown and largest component counts,
+        drawn below the fps counter
+        """
+        lines = [f"frame {profiler.frame_summary()['mean_ms']:.1f}ms"]
+
+        for name, stats in profiler.processor_summary().items():
+            name = name.removesuffix("Processor")
+            lines.append(f"{name} {stats['mean_ms']:.1f}ms")
+
+        counts = sorted(
+            profiler.latest_entity_counts().items(),
+            key=lambda item: item[1],
+            reverse=True,
+        )
 
-            screen.blit(fps_overlay, (0, 0))
+        for name, count in counts[:5]:
+            lines.append(f"{name} x{count}")
 
-        pygame.display.flip()
+        for i, line in enumerate(lines):
+            blits.append((self.profiler_text.render(i, line), (0, 30 + i * 16)))
 
 
 class BulletAmmoProcessor(esper.Processor):
+    reads = (PlayerShip,)
+    writes = (BulletAmmo,)
+
     def process(self, *args, delta, **kwargs):
         for ent, (player_ship, bullet_ammo) in self.world.get_components(
             PlayerShip, BulletAmmo
@@ -167,51 +575,330 @@ class BulletAmmoProcessor(esper.Processor):
                 bullet_ammo.elapsed = 0.0
 
 
+class CollisionProcessor(esper.Processor):
+    """
+    Finds contacts between collidable entities of groups whose collision
+    layers collide, into the Contacts next to the SpatialIndex, for the
+    processors after it to act on
+
+    Entities of each layer look for contacts in the spatial index grid of
+    every layer in their mask, so those layers need a grid. A layer masking
+    itself, e.g. asteroids with asteroids, is paired up within its grid,
+    each pair once. Contacts may involve entities deleted earlier in the
+    frame, consumers check.
+
+    masks: for each CollisionLayer, the layers it looks for contacts with,
+        see collision.DEFAULT_MASKS
+    swept: test circles along the path they moved over the frame, rather than
+        only where they are now, so fast bullets hit asteroids they would
+        otherwise jump over at low frame rates or on long frames. Other
+        shapes are tested where they are now.
+
+    When a grid is crowded and there are enough candidate pairs, with
+    collisions not swept, the bounding circles of all of them are compared at
+    once with NumPy instead, see collision.circle_hits, and only those
+    overlapping go through the narrowphase. Spread out or few, grid lookups
+    are cheaper. Both ways find the same contacts, in the same order.
+    """
+
+    reads = (
+        SpatialIndex,
+        Asteroid,
+        Bullet,
+        PlayerShip,
+        Collidable,
+        Position,
+        Velocity,
+    )
+    writes = (Contacts,)
+
+    # px/ms, no target is faster, widens the area searched for swept contacts
+    max_target_speed = 0.05
+
+    # grid entries per occupied cell, and candidate pairs, from which
+    # comparing all pairs with NumPy beats grid lookups
+    vectorize_crowding = 2.0
+    vectorize_from = 5_000
+
+    def __init__(
+        self,
+        *,
+        masks: dict[CollisionLayer, CollisionLayer] | None = None,
+        swept: bool = False,
+    ):
+        super().__init__()
+
+        self.pairs = layer_pairs(DEFAULT_MASKS if masks is None else masks)
+        self.swept = swept
+
+    def process(self, *args, delta, **kwargs):
+        world = self.world
+        _, spatial_index = world.get_singleton(SpatialIndex)
+        _, contacts = world.get_singleton(Contacts)
+
+        contacts.pairs.clear()
+
+        for group, other_group in self.pairs:
+            grid = spatial_index.grids.get(other_group)
+
+            if grid is None:
+                raise ValueError(f"No {other_group.__name__} grid to find contacts in")
+
+            found = contacts.pairs[group, other_group] = []
+            count = len(grid.entries)
+
+            if group is other_group:
+                if self.vectorize(grid, count * (count - 1) // 2):
+                    self.find_vectorized(None, grid, found)
+                else:
+                    self.find_within(grid, delta, found)
+
+                continue
+
+            entities = world.get_components(group, Collidable, Position)
+
+            if self.vectorize(grid, len(entities) * count):
+                self.find_vectorized(entities, grid, found)
+                continue
+
+            for ent, (_, collidable, pos) in entities:
+                if self.swept:
+                    self.find_swept(ent, collidable, pos, grid, delta, found)
+                else:
+                    self.find(ent, collidable, pos, grid, found)
+
+            # in the order the vectorized path finds them
+            found.sort()
+
+    def vectorize(self, grid: SpatialHash, candidates: int) -> bool:
+        return (
+            not self.swept
+            and candidates >= self.vectorize_from
+            and len(grid.entries) >= self.vectorize_crowding * len(grid.cells)
+        )
+
+    def find(
+        self,
+        ent: int,
+        collidable: Collidable,
+        pos: Position,
+        grid: SpatialHash,
+        found: list,
+    ):
+        # only entries in neighbouring cells can possibly collide
+        for other_ent, other_pos, other_collidable in grid.query(
+            pos.x, pos.y, get_collidable_extent(collidable)
+        ):
+            if NARROWPHASE[collidable.kind, other_collidable.kind](
+                pos, collidable, other_pos, other_collidable
+            ):
+                found.append((ent, other_ent, 1.0))
+
+    def find_swept(
+        self,
+        ent: int,
+        collidable: Collidable,
+        pos: Position,
+        grid: SpatialHash,
+        delta: float,
+        found: list,
+    ):
+        vel = self.world.try_component(ent, Velocity)
+
+        # where it was at the start of the frame
+        start_x = pos.x - vel.x * delta if vel else pos.x
+        start_y = pos.y - vel.y * delta if vel else pos.y
+
+        reach = get_collidable_extent(collidable) + self.max_target_speed * delta
+
+        for other_ent, other_pos, other_collidable in grid.query_rect(
+            min(start_x, pos.x) - reach,
+            min(start_y, pos.y) - reach,
+            max(start_x, pos.x) + reach,
+            max(start_y, pos.y) + reach,
+        ):
+            time = self.sweep(
+                ent, pos, collidable, other_ent, other_pos, other_collidable, delta
+            )
+
+            if time is not None:
+                found.append((ent, other_ent, time))
+
+    def find_vectorized(
+        self, entities: list[tuple[int, list]] | None, grid: SpatialHash, found: list
+    ):
+        """
+        Contacts of the entities, or those within the grid if None, with the
+        entries of the grid, in the order of both
+        """
+        others, other_circles = grid.arrays()
+
+        if entities is None:
+            sources, circles = others, other_circles
+        else:
+            sources = [(ent, pos, collidable) for ent, (_, collidable, pos) in entities]
+            circles = np.array(
+                [
+                    (pos.x, pos.y, get_collidable_extent(collidable))
+                    for _, pos, collidable in sources
+                ],
+                dtype=np.float64,
+            ).reshape(-1, 3)
+
+        hits, other_hits = circle_hits(circles, other_circles, same=entities is None)
+
+        for index, other_index in zip(hits.tolist(), other_hits.tolist()):
+            ent, pos, collidable = sources[index]
+            other_ent, other_pos, other_collidable = others[other_index]
+
+            # bounding circles overlap, only exact for circles
+            if (
+                collidable.kind == CollidableKind.Circle
+                and other_collidable.kind == CollidableKind.Circle
+            ) or NARROWPHASE[collidable.kind, other_collidable.kind](
+                pos, collidable, other_pos, other_collidable
+            ):
+                found.append((ent, other_ent, 1.0))
+
+    def find_within(self, grid: SpatialHash, delta: float, found: list):
+        margin = 2 * self.max_target_speed * delta if self.swept else 0.0
+
+        for first, second in grid.pairs(margin):
+            if second[0] < first[0]:
+                first, second = second, first
+
+            ent, pos, collidable = first
+            other_ent, other_pos, other_collidable = second
+
+            if self.swept:
+                time = self.sweep(
+                    ent, pos, collidable, other_ent, other_pos, other_collidable, delta
+                )
+            elif NARROWPHASE[collidable.kind, other_collidable.kind](
+                pos, collidable, other_pos, other_collidable
+            ):
+                time = 1.0
+            else:
+                time = None
+
+            if time is not None:
+                found.append((ent, other_ent, time))
+
+        found.sort()
+
+    def sweep(
+        self,
+        ent: int,
+        pos: Position,
+        collidable: Collidable,
+        other_ent: int,
+        other_pos: Position,
+        other_collidable: Collidable,
+        delta: float,
+    ) -> float | None:
+        return check_swept_collision(
+            pos,
+            self.world.try_component(ent, Velocity),
+            collidable,
+            other_pos,
+            self.world.try_component(other_ent, Velocity),
+            other_collidable,
+            delta,
+        )
+
+
 class BulletProcessor(esper.Processor):
+    """
+    Bullets destroy the first asteroid they touched on the frame, see
+    CollisionProcessor, and are removed when they leave the world
+    """
+
+    reads = (WorldBounds, Contacts, Asteroid, Bullet, Position)
+    writes = (ScoreTracker,)
+
     def process(self, *args, **kwargs):
-        # TODO clean this up
-        # could be more efficient than N^2
+        world = self.world
+        _, contacts = world.get_singleton(Contacts)
+        world_bounds = get_world_bounds(world)
 
-        for ent, (bullet, collidable, pos) in self.world.get_components(
-            Bullet, Collidable, Position
+        for ent, hits in itertools.groupby(
+            contacts.pairs.get((Bullet, Asteroid), ()), key=operator.itemgetter(0)
         ):
-            for other_ent, (
-                asteroid,
-                other_collidable,
-                other_pos,
-            ) in self.world.get_components(Asteroid, Collidable, Position):
-                if check_collision(pos, collidable, other_pos, other_collidable):
-                    logger.info("Destroying entity id=%d", other_ent)
+            if not world.entity_exists(ent):
+                continue
+
+            # skipping asteroids already destroyed by another bullet this frame
+            hit = min(
+                (hit for hit in hits if world.entity_exists(hit[1])),
+                key=operator.itemgetter(2),
+                default=None,
+            )
+
+            if hit is None:
+                continue
+
+            other_ent = hit[1]
 
-                    track_score_event(self.world, ScoreEventKind.EnemyKill)
+            logger.info("Destroying entity id=%d", other_ent)
 
-                    ## destroy enemy and self
-                    self.world.delete_entity(other_ent)
-                    self.world.delete_entity(ent)
+            track_score_event(world, ScoreEventKind.EnemyKill)
 
-                    break
+            ## destroy enemy and self
+            world.commands.delete(other_ent)
+            world.commands.delete(ent)
 
+        for ent, (_, pos) in world.get_components(Bullet, Position):
             # cleanup: when bullet leaves world boundaries
             if (
                 pos.x <= 0
-                or pos.x >= SCREEN_WIDTH
+                or pos.x >= world_bounds.width
                 or pos.y <= 0
-                or pos.y >= SCREEN_HEIGHT
+                or pos.y >= world_bounds.height
             ):
                 logger.info("Bullet out of bounds id=%d", ent)
-                self.world.delete_entity(ent)
+                world.commands.delete(ent)
 
 
 class PlayerInputProcessor(esper.Processor):
+    reads = (PlayerShip,)
+    writes = (
+        PlayerKeyInput,
+        Acceleration,
+        Rotation,
+        BulletAmmo,
+        Entities,
+        Bullet,
+        Position,
+        Velocity,
+        Renderable,
+        Collidable,
+    )
+
     def process(self, *args, **kwargs):
+        # events may be addressed to a player ship with its own PlayerKeyInput,
+        # the others go to the standalone input entity of the local player
+        events_by_player = {}
+
+        for input_event in kwargs["player_input_events"]:
+            events_by_player.setdefault(input_event.get("player"), []).append(
+                input_event
+            )
+
+        for ent, player_key_input in self.world.get_component(PlayerKeyInput):
+            player = ent if self.world.has_component(ent, PlayerShip) else None
+
+            self.process_player(
+                player, player_key_input, events_by_player.get(player, ())
+            )
+
+    def process_player(
+        self, player: int | None, player_key_input: PlayerKeyInput, input_events
+    ):
         # TODO consider sorting by keydown, then keyup,
         #   in case we receive a sequence "out of order" like
         #   [W key up, W key down]
-        input_events = kwargs["player_input_events"]
         player_actions = []
 
-        _, player_key_input = self.world.get_component(PlayerKeyInput)[0]
-
         for input_event in input_events:
             logger.debug(
                 "Processing player input event kind=%d key=%d",
@@ -239,7 +926,9 @@ class PlayerInputProcessor(esper.Processor):
 
         # keydowns are updated every frame
         # e.g. to accelerate in rotated direction
-        for key in player_key_input.keydowns:
+        # sorted, as set order depends on its history and the last of
+        # conflicting keys wins
+        for key in sorted(player_key_input.keydowns):
             match key:
                 case pygame.constants.K_w:
                     player_actions.append(PlayerActionKind.Accelerate)
@@ -254,56 +943,68 @@ class PlayerInputProcessor(esper.Processor):
             match action:
                 case PlayerActionKind.Accelerate:
                     # could add/remove acceleration component instead of modifying
-                    set_player_acceleration(self.world, forward=True)
+                    set_player_acceleration(self.world, forward=True, player=player)
                 case PlayerActionKind.StopAccelerating:
-                    set_player_acceleration(self.world, unset=True)
+                    set_player_acceleration(self.world, unset=True, player=player)
                 case PlayerActionKind.Decelerate:
-                    set_player_acceleration(self.world, forward=False)
+                    set_player_acceleration(self.world, forward=False, player=player)
                 case PlayerActionKind.StopDecelerating:
-                    set_player_acceleration(self.world, unset=True)
+                    set_player_acceleration(self.world, unset=True, player=player)
                 case PlayerActionKind.Fire:
-                    create_bullet(self.world)
+                    create_bullet(self.world, player)
                 case PlayerActionKind.RotateLeft:
-                    set_player_rotating_left(self.world, True)
+                    set_player_rotating_left(self.world, True, player)
                 case PlayerActionKind.StopRotateLeft:
-                    set_player_rotating_left(self.world, False)
+                    set_player_rotating_left(self.world, False, player)
                 case PlayerActionKind.RotateRight:
-                    set_player_rotating_right(self.world, True)
+                    set_player_rotating_right(self.world, True, player)
                 case PlayerActionKind.StopRotateRight:
-                    set_player_rotating_right(self.world, False)
+                    set_player_rotating_right(self.world, False, player)
 
 
 class ScoreTimeTrackerProcessor(esper.Processor):
+    reads = ()
+    writes = (ScoreTracker,)
+
     def process(self, *args, delta, **kwargs):
         for _, score_tracker in self.world.get_component(ScoreTracker):
             score_tracker.scores[ScoreEventKind.Time] += delta / 1_000.0
 
 
 class PlayerMovementVisualEffectProcessor(esper.Processor):
+    reads = (PlayerShip, Velocity)
+    writes = (Entities, Position, Lifetime, Renderable)
+
     elapsed = 0.0
 
+    # kept in world snapshots
+    snapshot_fields = ("elapsed",)
+
     def process(self, *args, delta, **kwargs):
         self.elapsed += delta
 
-        _, (_, pos, vel) = self.world.get_components(PlayerShip, Position, Velocity)[0]
+        if self.elapsed <= 250.0:
+            return
 
-        # spawn new visual effect
-        if self.elapsed > 250.0 and vel.magnitude > 0.20:
-            logger.debug("Spawning movement visual effect")
+        for _, (_, pos, vel) in self.world.get_components(
+            PlayerShip, Position, Velocity
+        ):
+            # spawn new visual effect
+            if vel.magnitude > 0.20:
+                logger.debug("Spawning movement visual effect")
 
-            self.world.create_entity(
-                Position(x=pos.x, y=pos.y),
-                Lifetime(remaining=2.0 * 1_000.0),
-                Renderable(kind=RenderableKind.Circle, color=(125, 125, 125), radius=3),
-            )
+                create_movement_trail(self.world, pos)
 
-            self.elapsed = 0.0
+                self.elapsed = 0.0
 
 
 class LifetimeProcessor(esper.Processor):
+    reads = ()
+    writes = (Lifetime,)
+
     def process(self, *args, delta, **kwargs):
         for ent, lifetime in self.world.get_component(Lifetime):
             lifetime.remaining -= delta
 
             if lifetime.remaining < 0.0:
-                self.world.delete_entity(ent)
+                self.world.commands.delete(ent)
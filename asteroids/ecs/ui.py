@@ -1,3 +1,5 @@
+import math
+
 import pygame
 
 from .components import Position, Renderable
@@ -5,23 +7,109 @@ from .enums import RenderableKind
 from .utils import apply_rotation_to_offset
 
 
-def render(screen: pygame.Surface, renderable: Renderable, position: Position):
-    render_position = position
+class SpriteCache:
+    """
+    Pre-rasterized surfaces keyed by (kind, radius, color)
 
-    if renderable.offset:
-        offset_rotated = apply_rotation_to_offset(
-            renderable.offset, render_position.rotation
-        )
+    Each shape is drawn once onto a colorkeyed surface, so a frame only has to
+    blit cached surfaces instead of rasterizing every renderable again.
+    """
+
+    def __init__(self):
+        self.sprites: dict[tuple, tuple[pygame.Surface, int] | None] = {}
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def get(self, renderable: Renderable) -> tuple[pygame.Surface, int] | None:
+        """
+        Surface for the renderable, and the distance from its top left corner
+        to the shape's center
+        """
+        key = (renderable.kind, renderable.radius, renderable.color)
+
+        try:
+            return self.sprites[key]
+        except KeyError:
+            return self.sprites.setdefault(key, rasterize(renderable))
+
+
+class TextCache:
+    """
+    Rendered text surfaces per HUD slot
+
+    A slot's text is only rendered again when it differs from the text that
+    was last rendered for that slot.
+    """
+
+    def __init__(self, font: pygame.font.Font, color=(0, 0, 0)):
+        self.font = font
+        self.color = color
+
+        self.entries: dict[object, tuple[str, pygame.Surface]] = {}
+
+    def render(self, slot, text: str) -> pygame.Surface:
+        entry = self.entries.get(slot)
+
+        if entry is None or entry[0] != text:
+            entry = self.entries[slot] = (
+                text,
+                self.font.render(text, True, self.color),
+            )
+
+        return entry[1]
 
-        render_position = Position(
-            x=render_position.x + offset_rotated.x,
-            y=render_position.y + offset_rotated.y,
-        )
 
+def rasterize(renderable: Renderable) -> tuple[pygame.Surface, int] | None:
     match renderable.kind:
         case RenderableKind.Circle:
+            center = math.ceil(renderable.radius)
+
+            # any color other than the circle's works as transparent background
+            colorkey = (255, 0, 255) if renderable.color != (255, 0, 255) else (0, 0, 0)
+
+            surface = pygame.Surface((center * 2 + 1, center * 2 + 1))
+            surface.fill(colorkey)
+            surface.set_colorkey(colorkey, pygame.RLEACCEL)
+
             pygame.draw.circle(
-                screen, renderable.color, render_position.tuple, renderable.radius
+                surface, renderable.color, (center, center), renderable.radius
             )
+
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert()
+
+            return surface, center
         case RenderableKind.Triangle:
-            pass
+            return None
+
+
+def render(
+    blits: list,
+    sprites: SpriteCache,
+    renderable: Renderable,
+    position: Position,
+    origin: tuple[float, float] = (0.0, 0.0),
+):
+    """
+    Queue the renderable's cached sprite into `blits`, a sequence for
+    Surface.blits
+
+    origin: world coordinates of the screen's top left corner
+    """
+    sprite = sprites.get(renderable)
+
+    if sprite is None:
+        return
+
+    surface, center = sprite
+
+    x, y = position.x, position.y
+
+    if renderable.offset:
+        offset_rotated = apply_rotation_to_offset(renderable.offset, position.rotation)
+
+        x += offset_rotated.x
+        y += offset_rotated.y
+
+    blits.append((surface, (x - center - origin[0], y - center - origin[1])))
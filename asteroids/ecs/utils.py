@@ -1,7 +1,15 @@
 import math
 
-from .components import Acceleration, Collidable, Position, PositionOffset, Velocity
-from .enums import CollidableKind
+from .components import (
+    Acceleration,
+    Collidable,
+    Position,
+    PositionOffset,
+    Renderable,
+    Velocity,
+)
+from .collision import collide
+from .enums import CollidableKind, RenderableKind
 
 
 def calculate_distance(pos1: Position, pos2: Position) -> float:
@@ -25,15 +33,74 @@ def calculate_velocity(
 def check_collision(
     pos1: Position, collidable1: Collidable, pos2: Position, collidable2: Collidable
 ) -> bool:
+    """
+    Whether the collidables overlap, see collision.NARROWPHASE
+    """
+    return collide(pos1, collidable1, pos2, collidable2)
+
+
+def check_swept_collision(
+    pos1: Position,
+    vel1: Velocity | None,
+    collidable1: Collidable,
+    pos2: Position,
+    vel2: Velocity | None,
+    collidable2: Collidable,
+    elapsed: float,
+) -> float | None:
+    """
+    Time of impact of two collidables that moved at constant velocity over the
+    last `elapsed` ms to their current positions, see sweep_circle_collision
+
+    Only circles are swept, other shapes are tested where they are now, and
+    hit at the end of the frame if they overlap.
+    """
     if (
         collidable1.kind == CollidableKind.Circle
         and collidable2.kind == CollidableKind.Circle
     ):
-        return check_circle_collision(
-            pos1, collidable1.radius, pos2, collidable2.radius
+        return sweep_circle_collision(
+            pos1, vel1, collidable1.radius, pos2, vel2, collidable2.radius, elapsed
         )
 
-    raise NotImplementedError("Collision check not implemented")
+    if collide(pos1, collidable1, pos2, collidable2):
+        return 1.0
+
+    return None
+
+
+def get_collidable_extent(collidable: Collidable) -> float:
+    """
+    Radius of a circle around the collidable's position that fully contains it
+    """
+    match collidable.kind:
+        case CollidableKind.Circle:
+            return collidable.radius
+        case CollidableKind.Triangle:
+            return collidable.height
+
+    raise NotImplementedError("Collidable extent not implemented")
+
+
+def get_render_extent(renderable: Renderable) -> float:
+    """
+    Radius of a circle around the entity's position that fully contains what
+    the renderable draws
+    """
+    match renderable.kind:
+        case RenderableKind.Circle:
+            extent = renderable.radius
+        case RenderableKind.Triangle:
+            extent = renderable.height
+        case _:
+            raise NotImplementedError("Renderable extent not implemented")
+
+    offset = renderable.offset
+
+    if offset is not None:
+        extent += math.sqrt(offset.x**2 + offset.y**2)
+
+    return extent
 
 
 def check_circle_collision(
@@ -47,6 +114,59 @@ def check_circle_collision(
     return distance < (radius1 + radius2)
 
 
+def sweep_circle_collision(
+    pos1: Position,
+    vel1: Velocity | None,
+    radius1: float,
+    pos2: Position,
+    vel2: Velocity | None,
+    radius2: float,
+    elapsed: float,
+) -> float | None:
+    """
+    When two circles that moved at constant velocity over the last `elapsed`
+    ms to their current positions first touched, as a fraction of `elapsed`
+    from 0 at the start to 1 now, or None when they did not
+
+    Unlike check_circle_collision it catches fast circles that passed through
+    each other between frames. A missing velocity counts as standing still.
+    """
+    relative_x = (vel2.x if vel2 else 0.0) - (vel1.x if vel1 else 0.0)
+    relative_y = (vel2.y if vel2 else 0.0) - (vel1.y if vel1 else 0.0)
+
+    # how far the second circle moved relative to the first over the frame,
+    # and where it was relative to the first at the start
+    motion_x = relative_x * elapsed
+    motion_y = relative_y * elapsed
+
+    start_x = pos2.x - pos1.x - motion_x
+    start_y = pos2.y - pos1.y - motion_y
+
+    reach = radius1 + radius2
+
+    # solve |start + motion * t| = reach for the earliest t
+    c = start_x**2 + start_y**2 - reach**2
+
+    if c < 0.0:
+        return 0.0
+
+    a = motion_x**2 + motion_y**2
+
+    if a == 0.0:
+        return None
+
+    b = 2.0 * (start_x * motion_x + start_y * motion_y)
+
+    discriminant = b**2 - 4.0 * a * c
+
+    if discriminant < 0.0:
+        return None
+
+    time = (-b - math.sqrt(discriminant)) / (2.0 * a)
+
+    return time if 0.0 <= time <= 1.0 else None
+
+
 def apply_rotation_to_offset(offset: PositionOffset, rotation: float) -> PositionOffset:
     if offset.x == 0:
         if offset.y > 0:
@@ -0,0 +1,390 @@
+import dataclasses
+import random
+
+import esper
+
+from .chunks import ChunkGrid
+from .commands import CommandBuffer
+from .pooling import EntityPools
+from .profiling import Profiler
+from .queries import QueryCache
+from .scheduling import ParallelScheduler, Schedule, run_processor
+from .storage import KinematicsPartition, KinematicsStore
+
+
+class World(esper.World):
+    """
+    esper World with optional array-backed storage for kinematic components,
+    optional per-processor profiling and pooling of short-lived entities
+
+    When a KinematicsStore is given, Position, Velocity, Acceleration and
+    Rotation instances are copied into it as they are added, and the entity
+    gets a view with the same attribute API in their place.
+
+    Components of entities registered with `pools` are handed back to their
+    archetype's pool once the entity is actually removed from the database.
+
+    All randomness in the simulation comes from `random`, seeded per world, so
+    the same seed and inputs always play out the same way.
+
+    With `chunks`, entities away from player ships are parked in the
+    ChunkGrid instead of the database, see ChunkProcessor.
+
+    Processors can be added to run only every Nth frame, see add_processor.
+    With a `scheduler`, processors that do not conflict run concurrently.
+
+    Query results are kept per component signature and updated as components
+    are added and removed, see QueryCache, rather than esper's cache being
+    cleared on every change. Entities that are the only one with a component
+    type, such as the scoreboard, are found through get_singleton.
+
+    Processors record entity creations and deletions in `commands` while they
+    iterate, see flush_commands for when they are applied. Outside of
+    process, creations through `commands` are applied straight away.
+    """
+
+    def __init__(
+        self,
+        *,
+        kinematics: KinematicsStore | KinematicsPartition | None = None,
+        profiler: Profiler | None = None,
+        seed: int | None = None,
+        chunks: ChunkGrid | None = None,
+        scheduler: ParallelScheduler | None = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+
+        self.seed = seed
+        self.random = random.Random(seed)
+
+        self.kinematics = kinematics
+        self.profiler = profiler
+        self.pools = EntityPools()
+        self.chunks = chunks
+        self.scheduler = scheduler
+        self.queries = QueryCache()
+        self.commands = CommandBuffer(self)
+
+        # within process, creations are deferred to the next flush
+        self.processing = False
+
+    def add_processor(self, processor_instance, priority=0, *, every=1, phase=0):
+        """
+        every: run the processor only every this many frames, with the delta
+            accumulated since its previous run
+        phase: stagger processors with the same rate, see Schedule
+        """
+        if every > 1:
+            processor_instance.schedule = Schedule(every, phase)
+
+        super().add_processor(processor_instance, priority)
+
+    def create_entity(self, *components) -> int:
+        self._next_entity_id += 1
+        entity = self._next_entity_id
+
+        if components:
+            self._insert_entity(entity, {type(c): c for c in components})
+
+        return entity
+
+    def _insert_entity(self, entity: int, components: dict[type, object]):
+        """
+        Add an entity that is not in the database with all its components at
+        once, matching it against each query once
+        """
+        kinematics = self.kinematics
+
+        if kinematics is not None:
+            for component_type in kinematics.component_types:
+                component = components.get(component_type)
+
+                if component is not None:
+                    components[component_type] = kinematics.attach(entity, component)
+
+        self._entities[entity] = components
+
+        for component_type in components:
+            owners = self._components.get(component_type)
+
+            if owners is None:
+                owners = self._components[component_type] = set()
+
+            owners.add(entity)
+
+        self.queries.inserted(entity, components)
+
+    def add_component(self, entity, component_instance, type_alias=None):
+        kinematics = self.kinematics
+
+        if (
+            kinematics is not None
+            and type_alias is None
+            and type(component_instance) in kinematics.component_types
+        ):
+            type_alias = type(component_instance)
+
+            if type_alias in self._entities.get(entity, ()):
+                kinematics.detach(entity, type_alias)
+
+            component_instance = kinematics.attach(entity, component_instance)
+
+        component_type = type_alias or type(component_instance)
+
+        owners = self._components.get(component_type)
+
+        if owners is None:
+            owners = self._components[component_type] = set()
+
+        owners.add(entity)
+
+        components = self._entities.get(entity)
+
+        if components is None:
+            components = self._entities[entity] = {}
+
+        components[component_type] = component_instance
+
+        self.queries.added(entity, components, component_type)
+
+    def remove_component(self, entity, component_type):
+        if (
+            self.kinematics is not None
+            and component_type in self.kinematics.component_types
+        ):
+            self.kinematics.detach(entity, component_type)
+
+        owners = self._components[component_type]
+        owners.discard(entity)
+
+        if not owners:
+            del self._components[component_type]
+
+        components = self._entities[entity]
+        del components[component_type]
+
+        if not components:
+            del self._entities[entity]
+
+        self.queries.removed(entity, component_type)
+
+        return entity
+
+    def delete_entity(self, entity, immediate=False):
+        if not immediate:
+            self._dead_entities.add(entity)
+            return
+
+        if self.kinematics is not None:
+            self.kinematics.release(entity)
+
+        self.pools.release(entity, self._entities[entity])
+
+        self._remove_entity(entity)
+
+    def entity_exists(self, entity):
+        return super().entity_exists(entity) and entity not in self.commands.deleted
+
+    def flush_commands(self):
+        """
+        Apply the creations and deletions recorded in `commands`
+
+        Runs after each processor, or each stage of a ParallelScheduler, so
+        the entities a processor creates are there for the processors after
+        it, as when created directly. Deletions are deferred as esper's are,
+        until the start of the next frame, where this runs again first so
+        those recorded between frames are cleared with the others.
+        """
+        commands = self.commands
+
+        if commands.created:
+            for entity, components in commands.created:
+                self._insert_entity(entity, {type(c): c for c in components})
+
+            commands.created.clear()
+
+        if commands.deleted:
+            self._dead_entities.update(commands.deleted)
+            commands.deleted.clear()
+
+    def _remove_entity(self, entity: int) -> dict[type, object]:
+        components = self._entities.pop(entity)
+
+        for component_type in components:
+            owners = self._components[component_type]
+            owners.discard(entity)
+
+            if not owners:
+                del self._components[component_type]
+
+        self.queries.deleted(entity, components)
+
+        return components
+
+    def get_component(self, component_type):
+        return self.queries.get(
+            component_type,
+            (component_type,),
+            True,
+            self._entities,
+            self._components,
+        ).get()
+
+    def get_components(self, *component_types):
+        return self.queries.get(
+            component_types,
+            component_types,
+            False,
+            self._entities,
+            self._components,
+        ).get()
+
+    def get_singleton(self, component_type: type) -> tuple[int, object]:
+        """
+        The entity having the given component type, and its component, for
+        types only one entity has such as ScoreTracker or WorldBounds
+
+        Raises LookupError when no entity has it. With several, the one with
+        the lowest id is returned.
+        """
+        query = self.queries.get(
+            component_type,
+            (component_type,),
+            True,
+            self._entities,
+            self._components,
+        )
+
+        if len(query.matches) == 1:
+            return next(iter(query.matches.items()))
+
+        results = query.get()
+
+        if not results:
+            raise LookupError(f"No entity has a {component_type.__name__}")
+
+        return results[0]
+
+    def clear_cache(self):
+        super().clear_cache()
+
+        self.queries.clear()
+
+    def clear_database(self):
+        if self.kinematics is not None:
+            self.kinematics.clear()
+
+        self.pools.clear()
+        self.commands.clear()
+
+        if self.chunks is not None:
+            self.chunks.clear()
+
+        super().clear_database()
+
+    def park_entity(self, entity: int) -> dict[type, object]:
+        """
+        Take the entity out of the database without deleting it, return its
+        components to put it back later with restore_entity
+
+        Kinematic components are copied out of the KinematicsStore.
+        """
+        components = self._remove_entity(entity)
+
+        kinematics = self.kinematics
+
+        if kinematics is not None:
+            for component_type in kinematics.component_types:
+                view = components.get(component_type)
+
+                if view is not None:
+                    components[component_type] = component_type(
+                        *(
+                            getattr(view, field.name)
+                            for field in dataclasses.fields(component_type)
+                        )
+                    )
+
+            kinematics.release(entity)
+
+        return components
+
+    def restore_entity(self, entity: int, components: dict[type, object]):
+        """
+        Put back an entity taken out with park_entity, keeping its id
+        """
+        self._insert_entity(entity, components)
+
+    def load_database(
+        self,
+        entities: dict[int, dict[type, object]],
+        components: dict[type, list[int]],
+        next_entity_id: int,
+        dead_entities: list[int],
+    ):
+        """
+        Replace the whole database at once, keeping entity ids, e.g. to restore
+        a snapshot
+
+        components: the entities having each component type
+        """
+        self.clear_database()
+
+        kinematics = self.kinematics
+
+        if kinematics is not None:
+            for entity, entity_components in entities.items():
+                for component_type in kinematics.component_types:
+                    component = entity_components.get(component_type)
+
+                    if component is not None:
+                        entity_components[component_type] = kinematics.attach(
+                            entity, component
+                        )
+
+        self._entities.update(entities)
+
+        for component_type, owners in components.items():
+            self._components[component_type] = set(owners)
+
+        self._next_entity_id = next_entity_id
+        self._dead_entities.update(dead_entities)
+
+        self.clear_cache()
+
+    def _clear_dead_entities(self):
+        kinematics = self.kinematics
+        pools = self.pools
+
+        for entity in self._dead_entities:
+            if kinematics is not None:
+                kinematics.release(entity)
+
+            pools.release(entity, self._entities[entity])
+
+            self._remove_entity(entity)
+
+        self._dead_entities.clear()
+
+    def process(self, *args, **kwargs):
+        # deletions recorded since the previous frame, outside any processor
+        self.flush_commands()
+
+        super().process(*args, **kwargs)
+
+    def _process(self, *args, **kwargs):
+        self.processing = True
+
+        try:
+            if self.scheduler is not None:
+                self.scheduler.run(self, *args, **kwargs)
+            elif self.profiler is not None:
+                self.profiler.process(self, *args, **kwargs)
+            else:
+                for processor in self._processors:
+                    run_processor(processor, *args, **kwargs)
+
+                    self.flush_commands()
+        finally:
+            self.processing = False
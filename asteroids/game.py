@@ -1,11 +1,29 @@
+import random
+
 import pygame
 
 from asteroids.constants import SCREEN_HEIGHT, SCREEN_WIDTH
 from asteroids.ecs.enums import InputEventKind
+from asteroids.replay import Recording
 from asteroids.world import build_world
 
 
-def play_game():
+def play_game(
+    *,
+    profile_path: str | None = None,
+    dirty_rects: bool = False,
+    record_path: str | None = None,
+    world_size: tuple[float, float] = (SCREEN_WIDTH, SCREEN_HEIGHT),
+    chunk_size: float | None = None,
+):
+    """
+    profile_path: write the profiler's recorded timings here on exit
+    dirty_rects: redraw and present only the changed parts of the screen
+    record_path: save a replayable recording of the session here on exit,
+        recordings are replayed in a world of the default size
+    world_size: (width, height) of the world, scrolled to follow the ship
+    chunk_size: only simulate chunks of this size near the ship at full rate
+    """
     #####
     # setup pygame
     #####
@@ -20,13 +38,24 @@ def play_game():
     # setup world
     #####
 
-    world = build_world()
+    # seed and inputs are all a replay needs to reproduce the session
+    recording = Recording(seed=random.randrange(2**32))
+
+    # profiling is cheap enough to always keep on, F3 toggles the overlay
+    world = build_world(
+        dirty_rects=dirty_rects,
+        profile=True,
+        seed=recording.seed,
+        world_size=world_size,
+        chunk_size=chunk_size,
+    )
 
     #####
     # core game loop
     #####
 
     running = True
+    show_profiler = False
 
     while running:
         input_events = []
@@ -35,6 +64,8 @@ def play_game():
             match event.type:
                 case pygame.QUIT:
                     running = False
+                case pygame.KEYDOWN if event.key == pygame.K_F3:
+                    show_profiler = not show_profiler
                 case pygame.KEYDOWN:
                     input_events.append(
                         {"kind": InputEventKind.KeyDown, "key": event.key}
@@ -46,12 +77,21 @@ def play_game():
 
         ms = clock.tick(30)
 
+        recording.record(ms, input_events)
+
         world.process(
             delta=ms,
             clock=clock,
             screen=screen,
             show_fps=True,
+            show_profiler=show_profiler,
             player_input_events=input_events,
         )
 
     pygame.quit()
+
+    if profile_path:
+        world.profiler.dump(profile_path)
+
+    if record_path:
+        recording.save(record_path)
@@ -0,0 +1,117 @@
+import argparse
+import logging
+import sys
+import time
+from typing import Iterable, Mapping
+
+import esper
+
+from asteroids.ecs.components import ScoreTracker
+from asteroids.ecs.enums import ScoreEventKind
+from asteroids.world import build_world
+
+
+logger = logging.getLogger(__name__)
+
+
+# frame index -> input events fed to PlayerInputProcessor on that frame
+InputScript = Mapping[int, Iterable[dict]]
+
+
+DEFAULT_DELTA = 1_000.0 / 30
+
+
+def step_world(
+    world: esper.World,
+    frames: int,
+    *,
+    delta: float = DEFAULT_DELTA,
+    input_script: InputScript | None = None,
+    start_frame: int = 0,
+):
+    """
+    Advance the world a number of frames with a fixed delta, as fast as the CPU
+    allows
+    """
+    input_script = input_script or {}
+
+    for frame in range(start_frame, start_frame + frames):
+        world.process(
+            delta=delta,
+            player_input_events=list(input_script.get(frame, ())),
+        )
+
+
+def run_headless(
+    frames: int,
+    *,
+    delta: float = DEFAULT_DELTA,
+    input_script: InputScript | None = None,
+    array_storage: bool = False,
+    seed: int | None = None,
+    parallel: bool = False,
+    swept_collisions: bool = False,
+) -> esper.World:
+    """
+    Build a world without rendering and simulate it, no display is opened
+    """
+    world = build_world(
+        array_storage=array_storage,
+        render=False,
+        seed=seed,
+        parallel=parallel,
+        swept_collisions=swept_collisions,
+    )
+
+    step_world(world, frames, delta=delta, input_script=input_script)
+
+    return world
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Run the simulation headless")
+    parser.add_argument("--frames", type=int, default=10_000)
+    parser.add_argument("--delta", type=float, default=DEFAULT_DELTA)
+    parser.add_argument("--array-storage", action="store_true")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="run processors that do not conflict concurrently",
+    )
+    parser.add_argument(
+        "--swept-collisions",
+        action="store_true",
+        help="hit asteroids bullets passed through between frames, for large deltas",
+    )
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+
+    world = run_headless(
+        args.frames,
+        delta=args.delta,
+        array_storage=args.array_storage,
+        seed=args.seed,
+        parallel=args.parallel,
+        swept_collisions=args.swept_collisions,
+    )
+
+    elapsed = time.perf_counter() - start
+
+    _, score_tracker = world.get_singleton(ScoreTracker)
+
+    logger.info(
+        "Simulated %d frames in %.2fs (%.0f frames/s), time=%.1f kills=%d",
+        args.frames,
+        elapsed,
+        args.frames / elapsed,
+        score_tracker.scores[ScoreEventKind.Time],
+        score_tracker.scores[ScoreEventKind.EnemyKill],
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+
+    main()
@@ -0,0 +1,267 @@
+import asyncio
+import enum
+import struct
+
+import esper
+import numpy as np
+
+from asteroids.ecs.components import Asteroid, Bullet, Collidable, PlayerShip
+
+
+# message kind, payload length
+MESSAGE = struct.Struct("<BI")
+# the receiving client's player ship
+WELCOME = struct.Struct("<I")
+# tick, created, deleted and updated entity counts
+FRAME = struct.Struct("<IIII")
+# input event kind, key, sent by clients back to back
+INPUT = struct.Struct("<BI")
+
+CREATED = np.dtype(
+    [
+        ("entity", "<u4"),
+        ("kind", "u1"),
+        ("radius", "<f4"),
+        ("x", "<f4"),
+        ("y", "<f4"),
+        ("vx", "<f4"),
+        ("vy", "<f4"),
+    ]
+)
+
+# replicated fields, bit i of an update mask is set when field i changed
+FIELDS = ("x", "y", "vx", "vy")
+FIELD_BITS = np.array([1 << bit for bit in range(len(FIELDS))], dtype=np.uint8)
+
+
+class MessageKind(enum.IntEnum):
+    Welcome = enum.auto()
+    Frame = enum.auto()
+
+
+class EntityKind(enum.IntEnum):
+    Other = 0
+    Asteroid = enum.auto()
+    Bullet = enum.auto()
+    PlayerShip = enum.auto()
+
+
+def pack_message(kind: MessageKind, payload: bytes) -> bytes:
+    return MESSAGE.pack(kind, len(payload)) + payload
+
+
+async def read_message(reader: asyncio.StreamReader) -> tuple[MessageKind, bytes]:
+    kind, length = MESSAGE.unpack(await reader.readexactly(MESSAGE.size))
+
+    return MessageKind(kind), await reader.readexactly(length)
+
+
+def describe(world: esper.World, entity: int) -> tuple[EntityKind, float]:
+    """
+    What a client needs to know to draw a newly replicated entity
+    """
+    for marker, kind in (
+        (Asteroid, EntityKind.Asteroid),
+        (Bullet, EntityKind.Bullet),
+        (PlayerShip, EntityKind.PlayerShip),
+    ):
+        if world.has_component(entity, marker):
+            break
+    else:
+        kind = EntityKind.Other
+
+    collidable = world.try_component(entity, Collidable)
+
+    return kind, collidable.radius if collidable else 0.0
+
+
+def gather_state(world: esper.World) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Ids of live entities in the world's KinematicsStore, sorted, and their
+    replicated fields
+    """
+    store = world.kinematics
+    n = store.size
+
+    entities = store.entities[:n]
+    values = np.stack([getattr(store, name)[:n] for name in FIELDS], axis=1).astype(
+        "<f4"
+    )
+
+    # deleted this tick, but only removed from the store on the next one
+    if world._dead_entities:
+        alive = ~np.isin(entities, list(world._dead_entities))
+        entities, values = entities[alive], values[alive]
+
+    order = np.argsort(entities)
+
+    return entities[order].astype("<u4"), values[order]
+
+
+class StateEncoder:
+    """
+    Encodes a world's kinematic state as frames holding only what changed
+    since the previous frame: created entities in full, deleted entity ids,
+    and for updated entities just the fields that changed
+
+    Frames are built once per tick, with whole-array comparisons against the
+    previous tick, and the same bytes can go to every client, so the cost of
+    encoding does not grow with the number of clients. Clients joining later
+    are first sent `full()`, the state as of the previous frame. With area of
+    interest replication each client has its own encoder instead, limited to
+    the entities near it.
+
+    Needs a world with array storage, every entity in its KinematicsStore is
+    replicated. Fields are sent as float32.
+    """
+
+    def __init__(self):
+        self.entities = np.zeros(0, dtype="<u4")
+        self.values = np.zeros((0, len(FIELDS)), dtype="<f4")
+
+        # entity -> kind, radius, sent when entities are created
+        self.descriptions: dict[int, tuple[EntityKind, float]] = {}
+
+        self.tick = 0
+
+    def encode(
+        self,
+        world: esper.World,
+        tick: int,
+        *,
+        state: tuple[np.ndarray, np.ndarray] | None = None,
+        visible: list[int] | None = None,
+    ) -> bytes:
+        """
+        state: gather_state(world), when already gathered for other encoders
+        visible: replicate only these entities, others are sent as deleted
+        """
+        entities, values = state if state is not None else gather_state(world)
+
+        if visible is not None:
+            shown = np.isin(entities, visible)
+            entities, values = entities[shown], values[shown]
+
+        previous_entities, previous_values = self.entities, self.values
+
+        # match current entities with the previous frame's, both are sorted
+        index = np.searchsorted(previous_entities, entities)
+        found = index < len(previous_entities)
+        found[found] = previous_entities[index[found]] == entities[found]
+
+        kept = np.zeros(len(previous_entities), dtype=bool)
+        kept[index[found]] = True
+
+        created = np.zeros(np.count_nonzero(~found), dtype=CREATED)
+        created["entity"] = entities[~found]
+
+        for name, column in zip(FIELDS, values[~found].T):
+            created[name] = column
+
+        for entity in created["entity"].tolist():
+            self.descriptions[entity] = describe(world, entity)
+
+        self._describe(created)
+
+        deleted = previous_entities[~kept]
+
+        for entity in deleted.tolist():
+            del self.descriptions[entity]
+
+        changed = values[found] != previous_values[index[found]]
+        masks = (changed * FIELD_BITS).sum(axis=1, dtype=np.uint8)
+        updated = masks != 0
+
+        updated_entities = entities[found][updated]
+        updated_masks = masks[updated]
+        updated_values = values[found][updated]
+
+        chunks = [
+            FRAME.pack(tick, len(created), len(deleted), len(updated_entities)),
+            created.tobytes(),
+            deleted.tobytes(),
+            updated_entities.tobytes(),
+            updated_masks.tobytes(),
+        ]
+
+        # one column of values per field, for the entities whose bit is set
+        for column, bit in enumerate(FIELD_BITS):
+            chunks.append(updated_values[updated_masks & bit != 0, column].tobytes())
+
+        self.entities, self.values = entities, values
+        self.tick = tick
+
+        return pack_message(MessageKind.Frame, b"".join(chunks))
+
+    def _describe(self, created: np.ndarray):
+        if len(created):
+            created["kind"], created["radius"] = zip(
+                *(self.descriptions[entity] for entity in created["entity"].tolist())
+            )
+
+    def full(self) -> bytes:
+        created = np.zeros(len(self.entities), dtype=CREATED)
+        created["entity"] = self.entities
+
+        for name, column in zip(FIELDS, self.values.T):
+            created[name] = column
+
+        self._describe(created)
+
+        return pack_message(
+            MessageKind.Frame,
+            FRAME.pack(self.tick, len(created), 0, 0) + created.tobytes(),
+        )
+
+
+class ClientState:
+    """
+    A client's copy of the replicated state, built up from frames
+    """
+
+    def __init__(self):
+        self.player: int | None = None
+        self.tick = 0
+
+        # entity -> [kind, radius, x, y, vx, vy]
+        self.entities: dict[int, list] = {}
+
+    def apply(self, kind: MessageKind, payload: bytes):
+        match kind:
+            case MessageKind.Welcome:
+                (self.player,) = WELCOME.unpack(payload)
+            case MessageKind.Frame:
+                self.apply_frame(payload)
+
+    def apply_frame(self, payload: bytes):
+        self.tick, created_count, deleted_count, updated_count = FRAME.unpack_from(
+            payload
+        )
+
+        offset = FRAME.size
+
+        created = np.frombuffer(payload, CREATED, created_count, offset)
+        offset += created.nbytes
+
+        deleted = np.frombuffer(payload, "<u4", deleted_count, offset)
+        offset += deleted.nbytes
+
+        updated = np.frombuffer(payload, "<u4", updated_count, offset)
+        offset += updated.nbytes
+
+        masks = np.frombuffer(payload, "u1", updated_count, offset)
+        offset += masks.nbytes
+
+        for entity, kind, radius, *fields in created.tolist():
+            self.entities[entity] = [EntityKind(kind), radius, *fields]
+
+        for entity in deleted.tolist():
+            self.entities.pop(entity, None)
+
+        for column, bit in enumerate(FIELD_BITS.tolist()):
+            changed = updated[masks & bit != 0]
+            values = np.frombuffer(payload, "<f4", len(changed), offset)
+            offset += values.nbytes
+
+            for entity, value in zip(changed.tolist(), values.tolist()):
+                self.entities[entity][2 + column] = value
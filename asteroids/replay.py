@@ -0,0 +1,217 @@
+import argparse
+import dataclasses
+import logging
+import struct
+import sys
+import time
+
+import esper
+
+from asteroids.ecs.components import ScoreTracker
+from asteroids.ecs.enums import InputEventKind, ScoreEventKind
+from asteroids.ecs.profiling import Profiler
+from asteroids.ecs.snapshot import Snapshot
+from asteroids.world import build_world
+
+
+logger = logging.getLogger(__name__)
+
+
+MAGIC = b"ASRP"
+VERSION = 1
+
+# magic, version, seed, frame count
+HEADER = struct.Struct("<4sHQI")
+# delta, input event count
+FRAME = struct.Struct("<dH")
+# input event kind, key
+EVENT = struct.Struct("<BI")
+
+
+@dataclasses.dataclass(slots=True)
+class Recording:
+    """
+    Everything needed to re-run a session: the world seed, and every frame's
+    delta and player input events
+    """
+
+    seed: int
+    frames: list[tuple[float, list[dict]]] = dataclasses.field(default_factory=list)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def record(self, delta: float, input_events: list[dict]):
+        self.frames.append((delta, input_events))
+
+    def to_bytes(self) -> bytes:
+        chunks = [HEADER.pack(MAGIC, VERSION, self.seed, len(self.frames))]
+
+        for delta, input_events in self.frames:
+            chunks.append(FRAME.pack(delta, len(input_events)))
+
+            for input_event in input_events:
+                chunks.append(EVENT.pack(input_event["kind"], input_event["key"]))
+
+        return b"".join(chunks)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Recording":
+        magic, version, seed, frame_count = HEADER.unpack_from(data)
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a version {VERSION} recording")
+
+        offset = HEADER.size
+        frames = []
+
+        for _ in range(frame_count):
+            delta, event_count = FRAME.unpack_from(data, offset)
+            offset += FRAME.size
+
+            input_events = []
+
+            for kind, key in EVENT.iter_unpack(
+                data[offset : offset + event_count * EVENT.size]
+            ):
+                input_events.append({"kind": InputEventKind(kind), "key": key})
+
+            offset += event_count * EVENT.size
+
+            frames.append((delta, input_events))
+
+        return cls(seed=seed, frames=frames)
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "Recording":
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def replay(
+    recording: Recording,
+    *,
+    frames: int | None = None,
+    array_storage: bool = False,
+    level_of_detail: bool = False,
+    profile: bool = False,
+) -> esper.World:
+    """
+    Re-run a recording headless, as fast as the CPU allows
+
+    frames: stop after this many frames, e.g. right before a hitch
+    """
+    world = build_world(
+        array_storage=array_storage,
+        level_of_detail=level_of_detail,
+        render=False,
+        seed=recording.seed,
+    )
+
+    # keep every frame's timings, not just the most recent ones
+    if profile:
+        world.profiler = Profiler(capacity=max(len(recording), 1))
+
+    for delta, input_events in recording.frames[:frames]:
+        world.process(delta=delta, player_input_events=input_events)
+
+    return world
+
+
+def check_snapshot(
+    recording: Recording,
+    split: int,
+    *,
+    array_storage: bool = False,
+    level_of_detail: bool = False,
+) -> bool:
+    """
+    Whether restoring a snapshot taken after `split` frames into a new world
+    and replaying the rest ends in the same state as replaying straight through
+    """
+    options = dict(array_storage=array_storage, level_of_detail=level_of_detail)
+
+    expected = Snapshot.capture(replay(recording, **options))
+
+    snapshot = Snapshot.capture(replay(recording, frames=split, **options))
+
+    world = build_world(render=False, seed=recording.seed, **options)
+    Snapshot.from_buffer(snapshot.to_bytes()).restore(world)
+
+    for delta, input_events in recording.frames[split:]:
+        world.process(delta=delta, player_input_events=input_events)
+
+    return Snapshot.capture(world).to_bytes() == expected.to_bytes()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Replay a recorded session")
+    parser.add_argument("recording")
+    parser.add_argument("--frames", type=int, help="stop after this many frames")
+    parser.add_argument("--array-storage", action="store_true")
+    parser.add_argument("--level-of-detail", action="store_true")
+    parser.add_argument(
+        "--profile", metavar="PATH", help="dump per-processor timings here"
+    )
+    parser.add_argument(
+        "--check-snapshot",
+        type=int,
+        metavar="FRAME",
+        help="check that restoring a snapshot taken after this many frames "
+        "replays to the same end state, instead of timing the replay",
+    )
+    args = parser.parse_args(argv)
+
+    recording = Recording.load(args.recording)
+
+    if args.check_snapshot is not None:
+        if not check_snapshot(
+            recording,
+            args.check_snapshot,
+            array_storage=args.array_storage,
+            level_of_detail=args.level_of_detail,
+        ):
+            logger.error("Snapshot after %d frames diverged", args.check_snapshot)
+            sys.exit(1)
+
+        logger.info("Snapshot after %d frames replays the same", args.check_snapshot)
+        return
+
+    start = time.perf_counter()
+
+    world = replay(
+        recording,
+        frames=args.frames,
+        array_storage=args.array_storage,
+        level_of_detail=args.level_of_detail,
+        profile=args.profile is not None,
+    )
+
+    elapsed = time.perf_counter() - start
+
+    frames = len(recording.frames[: args.frames])
+    played = sum(delta for delta, _ in recording.frames[: args.frames]) / 1_000
+
+    _, score_tracker = world.get_singleton(ScoreTracker)
+
+    logger.info(
+        "Replayed %d frames (%.1fs of play) in %.2fs, time=%.1f kills=%d",
+        frames,
+        played,
+        elapsed,
+        score_tracker.scores[ScoreEventKind.Time],
+        score_tracker.scores[ScoreEventKind.EnemyKill],
+    )
+
+    if args.profile:
+        world.profiler.dump(args.profile)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+
+    main()
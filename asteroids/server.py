@@ -0,0 +1,274 @@
+import argparse
+import asyncio
+import dataclasses
+import logging
+import sys
+import time
+
+import esper
+
+from asteroids.batch import RandomKeysPolicy
+from asteroids.ecs.components import PlayerKeyInput, Position, SpatialIndex
+from asteroids.ecs.entities import create_player_ship
+from asteroids.ecs.enums import InputEventKind
+from asteroids.protocol import (
+    INPUT,
+    WELCOME,
+    ClientState,
+    MessageKind,
+    StateEncoder,
+    gather_state,
+    pack_message,
+    read_message,
+)
+from asteroids.world import build_world
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(slots=True)
+class Client:
+    ship: int
+    # own encoder when replicating by area of interest
+    encoder: StateEncoder | None = None
+
+
+class GameServer:
+    """
+    Authoritative server, runs one world at a fixed tick and gives every
+    connected client its own player ship
+
+    Clients send input events as INPUT records, and receive a Welcome message
+    naming their ship, then one Frame message per tick. Clients that fall too
+    far behind on reading are disconnected rather than buffered for.
+
+    interest_radius: only replicate entities within this distance of each
+        client's ship, found through the area of interest grid
+    """
+
+    def __init__(
+        self,
+        *,
+        tick_rate: float = 30.0,
+        seed: int | None = None,
+        max_buffered: int = 1 << 20,
+        interest_radius: float | None = None,
+    ):
+        self.world: esper.World = build_world(
+            array_storage=True,
+            render=False,
+            seed=seed,
+            player=False,
+            area_of_interest=interest_radius is not None,
+        )
+        self.encoder = StateEncoder()
+        self.interest_radius = interest_radius
+
+        self.delta = 1_000.0 / tick_rate
+        self.tick = 0
+        self.max_buffered = max_buffered
+
+        self.clients: dict[asyncio.StreamWriter, Client] = {}
+        self.input_events: list[dict] = []
+
+        self.bytes_sent = 0
+        self.replication_time = 0.0
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.Server:
+        server = await asyncio.start_server(self.handle_client, host, port)
+
+        logger.info("Listening on %s", server.sockets[0].getsockname())
+
+        return server
+
+    async def handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        ship = create_player_ship(self.world)
+        self.world.add_component(ship, PlayerKeyInput())
+
+        logger.info("Player joined ship=%d", ship)
+
+        # the ship itself arrives as created in the next frame
+        writer.write(pack_message(MessageKind.Welcome, WELCOME.pack(ship)))
+
+        if self.interest_radius is None:
+            self.clients[writer] = Client(ship)
+
+            writer.write(self.encoder.full())
+        else:
+            self.clients[writer] = Client(ship, StateEncoder())
+
+        try:
+            while True:
+                kind, key = INPUT.unpack(await reader.readexactly(INPUT.size))
+
+                self.input_events.append(
+                    {"kind": InputEventKind(kind), "key": key, "player": ship}
+                )
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            logger.info("Player left ship=%d", ship)
+
+            self.clients.pop(writer, None)
+            self.world.delete_entity(ship)
+
+            writer.close()
+
+    def step(self):
+        input_events, self.input_events = self.input_events, []
+
+        self.world.process(delta=self.delta, player_input_events=input_events)
+        self.tick += 1
+
+        start = time.perf_counter()
+
+        state = gather_state(self.world)
+
+        if self.interest_radius is None:
+            frame = self.encoder.encode(self.world, self.tick, state=state)
+
+        for writer, client in list(self.clients.items()):
+            if writer.transport.get_write_buffer_size() > self.max_buffered:
+                logger.warning("Dropping slow client ship=%d", client.ship)
+
+                del self.clients[writer]
+                writer.close()
+
+                continue
+
+            if client.encoder is not None:
+                frame = client.encoder.encode(
+                    self.world,
+                    self.tick,
+                    state=state,
+                    visible=self.visible_to(client.ship),
+                )
+
+            writer.write(frame)
+            self.bytes_sent += len(frame)
+
+        self.replication_time += time.perf_counter() - start
+
+    def visible_to(self, ship: int) -> list[int]:
+        _, spatial_index = self.world.get_singleton(SpatialIndex)
+        pos = self.world.component_for_entity(ship, Position)
+
+        visible = [
+            entry[0]
+            for entry in spatial_index.interest.query(
+                pos.x, pos.y, self.interest_radius
+            )
+        ]
+
+        # ships created this tick are not in the grid yet
+        visible.append(ship)
+
+        return visible
+
+    async def run(self, ticks: int | None = None):
+        """
+        Step at the tick rate, late ticks are run straight away to catch up
+        """
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+
+        while ticks is None or self.tick < ticks:
+            self.step()
+
+            next_tick += self.delta / 1_000
+            await asyncio.sleep(max(next_tick - loop.time(), 0.0))
+
+
+async def run_stub_client(
+    host: str, port: int, *, ticks: int, seed: int, rate: float = 0.1
+) -> ClientState:
+    """
+    Connect, send random key presses and track the replicated state until the
+    given tick
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+
+    policy = RandomKeysPolicy(seed, rate=rate)
+    state = ClientState()
+
+    try:
+        while state.tick < ticks:
+            state.apply(*await read_message(reader))
+
+            for input_event in policy(None, state.tick):
+                writer.write(INPUT.pack(input_event["kind"], input_event["key"]))
+    except asyncio.IncompleteReadError:
+        pass
+    finally:
+        writer.close()
+
+    return state
+
+
+async def serve(args):
+    server = GameServer(
+        tick_rate=args.tick_rate, seed=args.seed, interest_radius=args.interest_radius
+    )
+    listener = await server.start(args.host, args.port)
+
+    host, port = listener.sockets[0].getsockname()[:2]
+
+    async with listener:
+        clients = [
+            asyncio.create_task(
+                run_stub_client(host, port, ticks=args.ticks, seed=seed)
+            )
+            for seed in range(args.stub_clients)
+        ]
+
+        # let the stub clients connect before the first tick
+        await asyncio.sleep(0.1)
+
+        await server.run(args.ticks)
+
+        await asyncio.gather(*clients)
+
+    ticks = max(server.tick, 1)
+
+    logger.info(
+        "Served %d ticks to %d clients, %.0f bytes/tick/client, replication %.3fms/tick",
+        server.tick,
+        args.stub_clients,
+        server.bytes_sent / ticks / max(args.stub_clients, 1),
+        server.replication_time / ticks * 1_000,
+    )
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Run the multiplayer server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--tick-rate", type=float, default=30.0)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--ticks", type=int, help="stop after this many ticks")
+    parser.add_argument(
+        "--interest-radius",
+        type=float,
+        help="only replicate entities this close to each client's ship",
+    )
+    parser.add_argument(
+        "--stub-clients",
+        type=int,
+        default=0,
+        help="connect this many clients sending random input, e.g. for testing",
+    )
+    args = parser.parse_args(argv)
+
+    asyncio.run(serve(args))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+
+    # per-entity logs would drown out the server's own
+    logging.getLogger("asteroids.ecs").setLevel(logging.WARNING)
+
+    main()
@@ -0,0 +1,284 @@
+import argparse
+import logging
+import random
+import sys
+import time
+from typing import Mapping
+
+import numpy as np
+import pygame.constants
+
+from asteroids.constants import SCREEN_HEIGHT, SCREEN_WIDTH
+from asteroids.ecs.components import (
+    Asteroid,
+    BulletAmmo,
+    Contacts,
+    PlayerShip,
+    ScoreTracker,
+)
+from asteroids.ecs.enums import InputEventKind, PlayerActionKind, ScoreEventKind
+from asteroids.ecs.observation import ObservationEncoder
+from asteroids.ecs.storage import KinematicsPartition, KinematicsStore
+from asteroids.headless import DEFAULT_DELTA
+from asteroids.world import build_world
+
+
+logger = logging.getLogger(__name__)
+
+
+def _key_down(key: int) -> dict:
+    return {"kind": InputEventKind.KeyDown, "key": key}
+
+
+def _key_up(key: int) -> dict:
+    return {"kind": InputEventKind.KeyUp, "key": key}
+
+
+# action -> input events fed to PlayerInputProcessor, 0 means do nothing
+ACTION_EVENTS: dict[int, list[dict]] = {
+    0: [],
+    PlayerActionKind.Accelerate: [_key_down(pygame.constants.K_w)],
+    PlayerActionKind.StopAccelerating: [_key_up(pygame.constants.K_w)],
+    PlayerActionKind.Decelerate: [_key_down(pygame.constants.K_s)],
+    PlayerActionKind.StopDecelerating: [_key_up(pygame.constants.K_s)],
+    PlayerActionKind.RotateLeft: [_key_down(pygame.constants.K_a)],
+    PlayerActionKind.StopRotateLeft: [_key_up(pygame.constants.K_a)],
+    PlayerActionKind.RotateRight: [_key_down(pygame.constants.K_d)],
+    PlayerActionKind.StopRotateRight: [_key_up(pygame.constants.K_d)],
+    # bullets are fired when the key is released
+    PlayerActionKind.Fire: [
+        _key_down(pygame.constants.K_SPACE),
+        _key_up(pygame.constants.K_SPACE),
+    ],
+}
+
+# player x, y, cos/sin of rotation, velocity x, y, ammo, all roughly in [-1, 1]
+OBSERVATION_SIZE = 7
+
+DEFAULT_REWARD_WEIGHTS = {ScoreEventKind.EnemyKill: 1.0, ScoreEventKind.Time: 0.0}
+
+
+class VectorEnv:
+    """
+    K independent headless worlds stepped in lockstep with batched actions
+
+    Kinematic components of all worlds live in one shared KinematicsStore, so
+    movement is integrated once per step for every world, and player state is
+    gathered from it with array indexing. Other processors still run per
+    world.
+
+    An episode ends when the player ship touches an asteroid, or after
+    max_frames. Finished worlds are rebuilt with a fresh seed right away, so
+    the returned observation of a done world is the first of its next episode.
+
+    Observations hold only the player's state, unless an ObservationEncoder is
+    given to also describe its surroundings.
+
+    Returned arrays are reused between steps, copy them to keep them.
+    """
+
+    def __init__(
+        self,
+        worlds: int,
+        *,
+        seed: int | None = None,
+        delta: float = DEFAULT_DELTA,
+        max_frames: int = 9_000,
+        reward_weights: Mapping[ScoreEventKind, float] | None = None,
+        encoder: ObservationEncoder | None = None,
+    ):
+        self.delta = delta
+        self.max_frames = max_frames
+        self.reward_weights = dict(reward_weights or DEFAULT_REWARD_WEIGHTS)
+        self.encoder = encoder
+
+        self.random = random.Random(seed)
+
+        self.kinematics = KinematicsStore(capacity=1024 * worlds)
+        self.partitions = [
+            KinematicsPartition(self.kinematics, index) for index in range(worlds)
+        ]
+
+        self.worlds = [None] * worlds
+        self.seeds = np.zeros(worlds, dtype=np.uint32)
+        self.players = np.zeros(worlds, dtype=np.int64)
+        self.frames = np.zeros(worlds, dtype=np.int64)
+        self.scores = np.zeros(worlds, dtype=np.float64)
+
+        self.observations = np.zeros(
+            (worlds, encoder.size if encoder else OBSERVATION_SIZE), dtype=np.float32
+        )
+        self.rewards = np.zeros(worlds, dtype=np.float32)
+        self.dones = np.zeros(worlds, dtype=bool)
+
+        self.slots = np.zeros(worlds, dtype=np.intp)
+
+    def __len__(self):
+        return len(self.worlds)
+
+    def reset(self) -> np.ndarray:
+        for index in range(len(self.worlds)):
+            self._reset_world(index)
+
+        return self._observe()
+
+    def _reset_world(self, index: int):
+        world = self.worlds[index]
+
+        # frees the world's slots in the shared store
+        if world is not None:
+            world.clear_database()
+
+        seed = self.random.randrange(2**32)
+
+        world = self.worlds[index] = build_world(
+            kinematics=self.partitions[index], render=False, seed=seed
+        )
+
+        self.seeds[index] = seed
+        self.players[index], _ = world.get_singleton(PlayerShip)
+        self.frames[index] = 0
+        self.scores[index] = self._score(world)
+
+    def _score(self, world) -> float:
+        _, score_tracker = world.get_singleton(ScoreTracker)
+
+        return sum(
+            weight * score_tracker.scores[kind]
+            for kind, weight in self.reward_weights.items()
+        )
+
+    def step(self, actions) -> tuple[np.ndarray, np.ndarray, np.ndarray, list[dict]]:
+        """
+        actions: one PlayerActionKind (or 0 for none) per world
+
+        Returns observations, rewards and done flags, plus per world info,
+        which holds the seed, length and scores of episodes that just ended
+        """
+        if len(actions) != len(self.worlds):
+            raise ValueError(f"Expected {len(self.worlds)} actions, got {len(actions)}")
+
+        # the same order as World.process, with movement hoisted out of the
+        # per-world processor runs and done once for every world
+        for world in self.worlds:
+            world.flush_commands()
+            world._clear_dead_entities()
+
+        self.kinematics.integrate(self.delta, SCREEN_WIDTH, SCREEN_HEIGHT)
+
+        for world, action in zip(self.worlds, actions):
+            world._process(
+                delta=self.delta, player_input_events=ACTION_EVENTS[int(action)]
+            )
+
+        self.frames += 1
+
+        infos = [{} for _ in self.worlds]
+
+        for index, world in enumerate(self.worlds):
+            score = self._score(world)
+
+            self.rewards[index] = score - self.scores[index]
+            self.scores[index] = score
+
+            done = self.frames[index] >= self.max_frames or self._player_hit(world)
+            self.dones[index] = done
+
+            if done:
+                _, score_tracker = world.get_singleton(ScoreTracker)
+
+                infos[index] = {
+                    "seed": int(self.seeds[index]),
+                    "frames": int(self.frames[index]),
+                    "scores": {
+                        kind.name: score for kind, score in score_tracker.scores.items()
+                    },
+                }
+
+                self._reset_world(index)
+
+        return self._observe(), self.rewards, self.dones, infos
+
+    def _player_hit(self, world) -> bool:
+        _, contacts = world.get_singleton(Contacts)
+
+        return bool(contacts.pairs.get((PlayerShip, Asteroid)))
+
+    def _observe(self) -> np.ndarray:
+        kinematics = self.kinematics
+        observations = self.observations
+        slots = self.slots
+
+        if self.encoder is not None:
+            for world, observation in zip(self.worlds, observations):
+                self.encoder.encode(world, out=observation)
+
+            return observations
+
+        for index, (partition, player) in enumerate(zip(self.partitions, self.players)):
+            slots[index] = partition.slot(int(player))
+
+        rotation = kinematics.rotation[slots]
+        vmax = kinematics.vmax[slots]
+
+        observations[:, 0] = kinematics.x[slots] / SCREEN_WIDTH
+        observations[:, 1] = kinematics.y[slots] / SCREEN_HEIGHT
+        observations[:, 2] = np.cos(rotation)
+        observations[:, 3] = np.sin(rotation)
+        observations[:, 4] = kinematics.vx[slots] / vmax
+        observations[:, 5] = kinematics.vy[slots] / vmax
+
+        for index, (world, player) in enumerate(zip(self.worlds, self.players)):
+            bullet_ammo = world.component_for_entity(int(player), BulletAmmo)
+
+            observations[index, 6] = bullet_ammo.count / bullet_ammo.max
+
+        return observations
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Step many worlds with random actions")
+    parser.add_argument("--worlds", type=int, default=16)
+    parser.add_argument("--steps", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    env = VectorEnv(args.worlds, seed=args.seed)
+    env.reset()
+
+    actions_rng = np.random.default_rng(args.seed)
+    action_choices = np.array(list(ACTION_EVENTS), dtype=np.int64)
+
+    start = time.perf_counter()
+    episodes = 0
+    total_reward = 0.0
+
+    for _ in range(args.steps):
+        _, rewards, dones, _ = env.step(
+            actions_rng.choice(action_choices, size=args.worlds)
+        )
+
+        episodes += int(dones.sum())
+        total_reward += float(rewards.sum())
+
+    elapsed = time.perf_counter() - start
+
+    logger.info(
+        "Stepped %d worlds %d times in %.2fs (%.0f world frames/s), "
+        "%d episodes ended, total reward %.0f",
+        args.worlds,
+        args.steps,
+        elapsed,
+        args.worlds * args.steps / elapsed,
+        episodes,
+        total_reward,
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+
+    # per-entity logs from every world would drown out the summary
+    logging.getLogger("asteroids.ecs").setLevel(logging.WARNING)
+
+    main()
@@ -1,27 +1,110 @@
 import esper
 
+from asteroids.constants import SCREEN_HEIGHT, SCREEN_WIDTH
+from asteroids.ecs.chunks import ChunkGrid
 from asteroids.ecs.entities import (
+    create_camera,
     create_player_ship,
     create_spawner,
     create_scoreboard,
     create_player_input,
+    create_spatial_index,
+    create_world_bounds,
 )
+from asteroids.ecs.enums import CollisionLayer
+from asteroids.ecs.profiling import Profiler
+from asteroids.ecs.scheduling import ParallelScheduler
+from asteroids.ecs.storage import KinematicsPartition, KinematicsStore
 from asteroids.ecs.systems import add_systems
+from asteroids.ecs.world import World
 
 
-def build_world() -> esper.World:
-    world = esper.World()
+def build_world(
+    *,
+    array_storage: bool = False,
+    kinematics: KinematicsStore | KinematicsPartition | None = None,
+    render: bool = True,
+    dirty_rects: bool = False,
+    profile: bool = False,
+    seed: int | None = None,
+    player: bool = True,
+    area_of_interest: bool = False,
+    world_size: tuple[float, float] = (SCREEN_WIDTH, SCREEN_HEIGHT),
+    chunk_size: float | None = None,
+    level_of_detail: bool = False,
+    parallel: bool = False,
+    swept_collisions: bool = False,
+    collision_masks: dict[CollisionLayer, CollisionLayer] | None = None,
+) -> esper.World:
+    """
+    array_storage: keep kinematic components in contiguous arrays so that
+        movement is integrated for all entities at once
+    kinematics: use this store, or partition of a store shared with other
+        worlds, instead of creating one
+    render: add the RenderingProcessor, which needs pygame to be initialized
+        and a screen to draw on
+    dirty_rects: only clear and present the parts of the screen that changed
+    profile: record per-processor timings and entity counts in world.profiler
+    seed: seed for world.random, which drives all randomness in the simulation
+    player: add the local player's ship and input, without it ships are added
+        per remote player
+    area_of_interest: index drawn entities by position, so that rendering
+        and replication only visit those near a viewport or observer, always
+        on for worlds larger than the screen
+    world_size: (width, height) of the world, the camera follows the player
+        ship when it is larger than the screen
+    chunk_size: split the world into chunks of this size, and only simulate
+        those near player ships at full rate
+    level_of_detail: update entities far from player ships and bullets, and
+        short-lived trails, only every few frames
+    parallel: run processors that do not conflict concurrently on a thread
+        pool
+    swept_collisions: hit asteroids that bullets passed through between
+        frames, so the simulation can run at a lower tick rate without bullets
+        missing
+    collision_masks: which collision layers look for contacts with which,
+        bullets and player ships with asteroids by default
+    """
+    if kinematics is None and array_storage:
+        kinematics = KinematicsStore()
+
+    width, height = world_size
+
+    if width > SCREEN_WIDTH or height > SCREEN_HEIGHT:
+        area_of_interest = True
+
+    world = World(
+        kinematics=kinematics,
+        profiler=Profiler() if profile else None,
+        seed=seed,
+        chunks=ChunkGrid(width, height, chunk_size) if chunk_size else None,
+        scheduler=ParallelScheduler() if parallel else None,
+    )
 
     # initialize systems
-    add_systems(world)
+    add_systems(
+        world,
+        render=render,
+        dirty_rects=dirty_rects,
+        level_of_detail=level_of_detail,
+        swept_collisions=swept_collisions,
+        collision_masks=collision_masks,
+    )
 
     # add entities
+    create_world_bounds(world, width, height)
+
+    create_camera(world, SCREEN_WIDTH, SCREEN_HEIGHT)
+
     create_scoreboard(world)
 
     create_spawner(world)
 
-    create_player_ship(world)
+    create_spatial_index(world, interest=area_of_interest)
+
+    if player:
+        create_player_ship(world)
 
-    create_player_input(world)
+        create_player_input(world)
 
     return world
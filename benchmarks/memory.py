@@ -0,0 +1,90 @@
+"""
+Memory per entity
+
+Spawns asteroids through spawn_asteroid and reports how much memory the world
+grew by per entity, as traced by tracemalloc, plus the time for one pass of
+the scalar movement integration over them.
+
+    python -m benchmarks.memory --entities 50000
+    python -m benchmarks.memory --entities 50000 --array-storage
+"""
+import argparse
+import gc
+import json
+import platform
+import time
+import tracemalloc
+
+from asteroids.ecs.entities import spawn_asteroid
+from asteroids.world import build_world
+
+from .processors import DELTA, current_commit
+
+
+def measure(entities: int, *, array_storage: bool, seed: int) -> dict:
+    world = build_world(array_storage=array_storage, render=False, seed=seed)
+
+    # warm up caches and pools so they are not counted against entities
+    world.process(delta=DELTA, player_input_events=[])
+
+    gc.collect()
+    tracemalloc.start()
+
+    before, _ = tracemalloc.get_traced_memory()
+
+    for _ in range(entities):
+        spawn_asteroid(world)
+
+    # the component query cache is part of the per-entity cost
+    world.process(delta=DELTA, player_input_events=[])
+
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    world.process(delta=DELTA, player_input_events=[])
+    frame_time = time.perf_counter() - start
+
+    return {
+        "entities": entities,
+        "array_storage": array_storage,
+        "bytes_per_entity": (after - before) / entities,
+        "frame_ms": frame_time * 1_000,
+    }
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entities", type=int, nargs="+", default=[50_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--array-storage", action="store_true")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    results = {
+        "commit": current_commit(),
+        "python": platform.python_version(),
+        "scenarios": [],
+    }
+
+    for entities in args.entities:
+        scenario = measure(entities, array_storage=args.array_storage, seed=args.seed)
+
+        print(
+            "entities={entities} array_storage={array_storage}: "
+            "{bytes_per_entity:.0f} bytes/entity, frame {frame_ms:.1f}ms".format(
+                **scenario
+            )
+        )
+
+        results["scenarios"].append(scenario)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Per-processor cost versus entity count
+
+Seeds worlds with a fixed number of asteroids, bullets and trail particles,
+steps them for a number of frames and reports mean / p99 time per processor.
+Entity counts are topped back up between frames (outside the timed region) so
+every frame runs against the configured load.
+
+    python -m benchmarks.processors --asteroids 100 1000 --bullets 10 100
+    python -m benchmarks.processors --output new.json --compare old.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+
+import esper
+
+from asteroids.constants import SCREEN_HEIGHT, SCREEN_WIDTH
+from asteroids.ecs.components import (
+    Asteroid,
+    Bullet,
+    BulletAmmo,
+    Lifetime,
+    PlayerShip,
+    Position,
+)
+from asteroids.ecs.entities import create_bullet, create_movement_trail, spawn_asteroid
+from asteroids.ecs.profiling import Profiler, summarize
+from asteroids.world import build_world
+
+
+DELTA = 1_000.0 / 30
+
+
+def random_position(world: esper.World, entity: int):
+    position = world.component_for_entity(entity, Position)
+
+    position.x = random.uniform(1, SCREEN_WIDTH - 1)
+    position.y = random.uniform(1, SCREEN_HEIGHT - 1)
+
+
+def populate(world: esper.World, *, asteroids: int, bullets: int, trails: int):
+    """
+    Top entity counts back up to the requested amounts
+    """
+    for _ in range(asteroids - len(world.get_component(Asteroid))):
+        random_position(world, spawn_asteroid(world))
+
+    _, (_, player_position, bullet_ammo) = world.get_components(
+        PlayerShip, Position, BulletAmmo
+    )[0]
+
+    for _ in range(bullets - len(world.get_component(Bullet))):
+        bullet_ammo.count = bullet_ammo.max
+        player_position.rotation = random.uniform(-3.14, 3.14)
+
+        random_position(world, create_bullet(world))
+
+    for _ in range(trails - len(world.get_component(Lifetime))):
+        random_position(world, create_movement_trail(world, player_position))
+
+
+def run_scenario(
+    *,
+    asteroids: int,
+    bullets: int,
+    trails: int,
+    frames: int,
+    render: bool,
+    array_storage: bool,
+    seed: int,
+) -> dict:
+    world = build_world(array_storage=array_storage, render=render, seed=seed)
+    world.profiler = Profiler(capacity=frames)
+
+    frame_times = []
+
+    kwargs = {"player_input_events": []}
+
+    if render:
+        import pygame
+
+        kwargs.update(
+            screen=pygame.display.get_surface(),
+            clock=pygame.time.Clock(),
+            show_fps=True,
+        )
+
+    for _ in range(frames):
+        populate(world, asteroids=asteroids, bullets=bullets, trails=trails)
+
+        start = time.perf_counter()
+        world.process(delta=DELTA, **kwargs)
+        frame_times.append(time.perf_counter() - start)
+
+    return {
+        "asteroids": asteroids,
+        "bullets": bullets,
+        "trails": trails,
+        "array_storage": array_storage,
+        "render": render,
+        "fps": len(frame_times) / sum(frame_times),
+        "frame": summarize(frame_times),
+        "processors": world.profiler.processor_summary(),
+        "pools": world.pools.stats(),
+    }
+
+
+def scenario_key(scenario: dict) -> tuple:
+    return tuple(
+        scenario[key]
+        for key in ("asteroids", "bullets", "trails", "array_storage", "render")
+    )
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(scenario: dict, baseline: dict | None = None):
+    print(
+        "asteroids={asteroids} bullets={bullets} trails={trails} "
+        "array_storage={array_storage} render={render}: {fps:.0f} fps".format(
+            **scenario
+        )
+    )
+
+    rows = [("frame", scenario["frame"])] + list(scenario["processors"].items())
+    baseline_rows = {}
+
+    if baseline:
+        baseline_rows = {"frame": baseline["frame"], **baseline["processors"]}
+
+    for name, stats in rows:
+        line = (
+            f"  {name:<40} mean {stats['mean_ms']:8.3f}ms  p99 {stats['p99_ms']:8.3f}ms"
+        )
+
+        if name in baseline_rows and baseline_rows[name]["mean_ms"]:
+            ratio = stats["mean_ms"] / baseline_rows[name]["mean_ms"]
+            line += f"  x{ratio:.2f} vs baseline"
+
+        print(line)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--asteroids", type=int, nargs="+", default=[10, 100, 1_000])
+    parser.add_argument("--bullets", type=int, nargs="+", default=[5, 50])
+    parser.add_argument("--trails", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--array-storage", action="store_true")
+    parser.add_argument("--render", action="store_true")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    args = parser.parse_args(argv)
+
+    if args.render:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+        import pygame
+
+        pygame.init()
+        pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    baselines = {}
+
+    if args.compare:
+        with open(args.compare) as f:
+            baselines = {
+                scenario_key(scenario): scenario
+                for scenario in json.load(f)["scenarios"]
+            }
+
+    results = {
+        "commit": current_commit(),
+        "python": platform.python_version(),
+        "frames": args.frames,
+        "delta": DELTA,
+        "seed": args.seed,
+        "scenarios": [],
+    }
+
+    for asteroids, bullets, trails in itertools.product(
+        args.asteroids, args.bullets, args.trails
+    ):
+        random.seed(args.seed)
+
+        scenario = run_scenario(
+            asteroids=asteroids,
+            bullets=bullets,
+            trails=trails,
+            frames=args.frames,
+            render=args.render,
+            array_storage=args.array_storage,
+            seed=args.seed,
+        )
+
+        report(scenario, baselines.get(scenario_key(scenario)))
+
+        results["scenarios"].append(scenario)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
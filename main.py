@@ -1,6 +1,8 @@
+import argparse
 import logging
 import sys
 
+from asteroids.constants import SCREEN_HEIGHT, SCREEN_WIDTH
 from asteroids.game import play_game
 
 
@@ -8,4 +10,42 @@ logging.basicConfig(stream=sys.stdout, level=logging.DEBUG)
 
 
 if __name__ == "__main__":
-    play_game()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--profile", metavar="PATH", help="dump per-processor timings on exit"
+    )
+    parser.add_argument(
+        "--dirty-rects",
+        action="store_true",
+        help="only redraw the parts of the screen that changed",
+    )
+    parser.add_argument(
+        "--record", metavar="PATH", help="save a replayable recording on exit"
+    )
+    parser.add_argument(
+        "--world-size",
+        type=float,
+        nargs=2,
+        metavar=("WIDTH", "HEIGHT"),
+        default=(SCREEN_WIDTH, SCREEN_HEIGHT),
+        help="play in a world larger than the screen",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=float,
+        help="only simulate chunks of this size near the ship at full rate",
+    )
+    args = parser.parse_args()
+
+    if args.record and (
+        tuple(args.world_size) != (SCREEN_WIDTH, SCREEN_HEIGHT) or args.chunk_size
+    ):
+        parser.error("recordings are only supported in the default world")
+
+    play_game(
+        profile_path=args.profile,
+        dirty_rects=args.dirty_rects,
+        record_path=args.record,
+        world_size=tuple(args.world_size),
+        chunk_size=args.chunk_size,
+    )